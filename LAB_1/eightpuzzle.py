@@ -14,6 +14,11 @@
 
 import search
 import random
+import os
+import sys
+import pickle
+from array import array
+from collections import deque
 
 # Module Classes
 
@@ -33,7 +38,8 @@ class EightPuzzleState:
 
         numbers: a list of integers from 0 to 8 representing an
           instance of the eight puzzle.  0 represents the blank
-          space.  Thus, the list
+          space.  Larger square puzzles are built the same way, e.g.
+          the numbers from 0 to 15 give a fifteen puzzle.  Thus, the list
 
             [1, 0, 2, 3, 4, 5, 6, 7, 8]
 
@@ -47,14 +53,15 @@ class EightPuzzleState:
             ------------
 
         The configuration of the puzzle is stored in a 2-dimensional
-        list (a list of lists) 'cells'.
+        list (a list of lists) 'cells' of 'size' rows and columns.
         """
+        self.size = int(round(len(numbers) ** 0.5))
         self.cells = []
-        numbers = numbers[:] # Make a copy so as not to cause side-effects.
+        numbers = list(numbers) # Make a copy so as not to cause side-effects.
         numbers.reverse()
-        for row in range( 3 ):
+        for row in range( self.size ):
             self.cells.append( [] )
-            for col in range( 3 ):
+            for col in range( self.size ):
                 self.cells[row].append( numbers.pop() )
                 if self.cells[row][col] == 0:
                     self.blankLocation = row, col
@@ -78,8 +85,8 @@ class EightPuzzleState:
         False
         """
         current = 0
-        for row in range( 3 ):
-            for col in range( 3 ):
+        for row in range( self.size ):
+            for col in range( self.size ):
                 if current != self.cells[row][col]:
                     return False
                 current += 1
@@ -99,11 +106,11 @@ class EightPuzzleState:
         row, col = self.blankLocation
         if(row != 0):
             moves.append('up')
-        if(row != 2):
+        if(row != self.size - 1):
             moves.append('down')
         if(col != 0):
             moves.append('left')
-        if(col != 2):
+        if(col != self.size - 1):
             moves.append('right')
         return moves
 
@@ -136,7 +143,8 @@ class EightPuzzleState:
             raise "Illegal Move"
 
         # Create a copy of the current eightPuzzle
-        newPuzzle = EightPuzzleState([0, 0, 0, 0, 0, 0, 0, 0, 0])
+        newPuzzle = EightPuzzleState.__new__(EightPuzzleState)
+        newPuzzle.size = self.size
         newPuzzle.cells = [values[:] for values in self.cells]
         # And update it to reflect the move
         newPuzzle.cells[row][col] = self.cells[newrow][newcol]
@@ -155,27 +163,34 @@ class EightPuzzleState:
               EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left')
           True
         """
-        for row in range( 3 ):
-            if self.cells[row] != other.cells[row]:
-                return False
-        return True
+        return self.cells == other.cells
 
     def __hash__(self):
-        return hash(str(self.cells))
+        return hash(self.getTiles())
+
+    def getTiles(self):
+        """
+          Returns the numbers of the puzzle, row by row, as a tuple.
+
+        >>> EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).getTiles()
+        (1, 0, 2, 3, 4, 5, 6, 7, 8)
+        """
+        return tuple(number for row in self.cells for number in row)
 
     def __getAsciiString(self):
         """
           Returns a display string for the maze
         """
         lines = []
-        horizontalLine = ('-' * (13))
+        width = len(str(self.size * self.size - 1))
+        horizontalLine = ('-' * ((width + 3) * self.size + 1))
         lines.append(horizontalLine)
         for row in self.cells:
             rowLine = '|'
             for col in row:
                 if col == 0:
                     col = ' '
-                rowLine = rowLine + ' ' + col.__str__() + ' |'
+                rowLine = rowLine + ' ' + col.__str__().rjust(width) + ' |'
             lines.append(rowLine)
             lines.append(horizontalLine)
         return '\n'.join(lines)
@@ -190,13 +205,19 @@ class EightPuzzleSearchProblem(search.SearchProblem):
       Implementation of a SearchProblem for the  Eight Puzzle domain
 
       Each state is represented by an instance of an eightPuzzle.
+
+      partition and cacheDir configure the pattern databases of
+      patternDatabaseHeuristic (see getPatternDatabases).
     """
-    def __init__(self,puzzle):
+    def __init__(self,puzzle,partition=None,cacheDir=None):
         "Creates a new EightPuzzleSearchProblem which stores search information."
         self.puzzle = puzzle
+        self.partition = partition
+        self.cacheDir = cacheDir
+        self.heuristicInfo = {}
 
     def getStartState(self):
-        return puzzle
+        return self.puzzle
 
     def isGoalState(self,state):
         return state.isGoal()
@@ -221,6 +242,187 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         """
         return len(actions)
 
+# Heuristics
+
+def manhattanPuzzleHeuristic(state, problem=None):
+    """
+      The sum of the Manhattan distances of the tiles to their goal cells.
+
+    >>> manhattanPuzzleHeuristic(EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]))
+    1
+    """
+    size = state.size
+    distance = 0
+    for cell, tile in enumerate(state.getTiles()):
+        if tile != 0:
+            distance += abs(cell // size - tile // size) + abs(cell % size - tile % size)
+    return distance
+
+def lineConflicts(goals):
+    """
+      goals: the goal columns (or rows) of the tiles of a line that belong to
+      that line, in their current order.
+
+    Returns how many of them must leave the line to let the others pass each
+    other: all of them but a longest increasing subsequence.
+    """
+    tails = []
+    for goal in goals:
+        i = 0
+        while i < len(tails) and tails[i] < goal:
+            i += 1
+        if i == len(tails):
+            tails.append(goal)
+        else:
+            tails[i] = goal
+    return len(goals) - len(tails)
+
+def linearConflictHeuristic(state, problem=None):
+    """
+      The Manhattan distance plus two moves for every tile that has to leave
+    its goal row or column to let other tiles of the line pass it.
+
+    >>> linearConflictHeuristic(EightPuzzleState([0, 2, 1, 3, 4, 5, 6, 7, 8]))
+    4
+    """
+    size = state.size
+    cells = state.cells
+    conflicts = 0
+    for line in range(size):
+        conflicts += lineConflicts([tile % size for tile in cells[line]
+                                    if tile != 0 and tile // size == line])
+        conflicts += lineConflicts([cells[row][line] // size for row in range(size)
+                                    if cells[row][line] != 0 and cells[row][line] % size == line])
+    return manhattanPuzzleHeuristic(state) + 2 * conflicts
+
+PATTERN_DATABASE_CACHE = {}
+
+def defaultPartition(size):
+    """
+      Splits the tiles of a puzzle into groups of at most 4 consecutive tiles,
+    which keeps the pattern databases small enough to be built in Python.
+
+    >>> defaultPartition(3)
+    ((1, 2, 3, 4), (5, 6, 7, 8))
+    """
+    tiles = list(range(1, size * size))
+    return tuple(tuple(tiles[i:i + 4]) for i in range(0, len(tiles), 4))
+
+def getPatternDatabases(size, partition=None, cacheDir=None):
+    """
+      Returns the PatternDatabases of a partition of the tiles of the puzzle
+    with size rows.  They are built once and cached in memory; if cacheDir is
+    given they are also stored in (and loaded from) files of that directory.
+    """
+    if partition is None:
+        partition = defaultPartition(size)
+    databases = []
+    for pattern in partition:
+        key = (size, tuple(pattern))
+        if key not in PATTERN_DATABASE_CACHE:
+            database = None
+            if cacheDir is not None:
+                fileName = os.path.join(cacheDir, 'pdb-blank-%d-%s.pickle' % (size, '-'.join(map(str, pattern))))
+                if os.path.exists(fileName):
+                    with open(fileName, 'rb') as f:
+                        database = pickle.load(f)
+            if database is None:
+                database = PatternDatabase(size, pattern)
+                if cacheDir is not None:
+                    if not os.path.isdir(cacheDir):
+                        os.makedirs(cacheDir)
+                    with open(fileName, 'wb') as f:
+                        pickle.dump(database, f)
+            PATTERN_DATABASE_CACHE[key] = database
+        databases.append(PATTERN_DATABASE_CACHE[key])
+    return databases
+
+class PatternDatabase:
+    """
+      The number of moves of the tiles of a pattern needed to bring them to
+    their goal cells, for every placement of those tiles, ignoring the other
+    tiles.  Only the moves of pattern tiles are counted, so the values of
+    disjoint patterns can be added up into an admissible heuristic.
+
+    The values are found by a 0-1 breadth-first search backwards from the
+    goal over the positions of the pattern tiles and the blank (moving the
+    blank onto another cell costs nothing) and stored in a flat array of
+    bytes indexed by a perfect hash of the positions of the pattern tiles and
+    by the cell of the blank.  Keeping the blank makes the values consistent:
+    a move changes the value of at most one database, by at most one.
+    """
+    UNKNOWN = 255
+
+    def __init__(self, size, pattern):
+        self.size = size
+        self.pattern = tuple(pattern)
+        numCells = size * size
+        tableSize = 1
+        for i in range(len(self.pattern)):
+            tableSize *= numCells - i
+        self.table = array('B', [self.UNKNOWN]) * (tableSize * numCells)
+
+        neighbors = []
+        for cell in range(numCells):
+            row, col = cell // size, cell % size
+            neighbors.append([r * size + c for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                              if 0 <= r < size and 0 <= c < size])
+
+        # The search states are the positions of the pattern tiles and of the
+        # blank, visited tracks them with a sparse base numCells index
+        start = (tuple(self.pattern), 0)
+        visited = bytearray(numCells ** (len(self.pattern) + 1))
+        frontier = deque([(start, 0)])
+        while frontier:
+            (positions, blank), cost = frontier.popleft()
+            index = blank
+            for position in positions:
+                index = index * numCells + position
+            if visited[index]:
+                continue
+            visited[index] = 1
+            self.table[self.rank(positions) * numCells + blank] = cost
+            for cell in neighbors[blank]:
+                if cell in positions:
+                    # A pattern tile slides into the blank, which costs one move
+                    moved = tuple(blank if position == cell else position for position in positions)
+                    frontier.append(((moved, cell), cost + 1))
+                else:
+                    frontier.appendleft(((positions, cell), cost))
+
+    def rank(self, positions):
+        """
+          Returns the perfect hash of the positions of the pattern tiles: their
+        index among the ordered selections of len(positions) distinct cells.
+        """
+        numCells = self.size * self.size
+        rank, used = 0, 0
+        for i, position in enumerate(positions):
+            rank = rank * (numCells - i) + position - bin(used & ((1 << position) - 1)).count('1')
+            used |= 1 << position
+        return rank
+
+    def getValue(self, cellOfTile):
+        "Returns the value of the placement of the tiles (and blank) given by cellOfTile"
+        rank = self.rank([cellOfTile[tile] for tile in self.pattern])
+        return self.table[rank * self.size * self.size + cellOfTile[0]]
+
+def patternDatabaseHeuristic(state, problem):
+    """
+      The sum of the disjoint additive pattern databases of the problem, or the
+    linear conflict heuristic if it is larger.  The databases are built (or
+    loaded from problem.cacheDir) the first time the heuristic is called.
+    """
+    databases = problem.heuristicInfo.get('patternDatabases')
+    if databases is None:
+        databases = getPatternDatabases(state.size, problem.partition, problem.cacheDir)
+        problem.heuristicInfo['patternDatabases'] = databases
+    cellOfTile = [0] * (state.size * state.size)
+    for cell, tile in enumerate(state.getTiles()):
+        cellOfTile[tile] = cell
+    value = sum(database.getValue(cellOfTile) for database in databases)
+    return max(value, linearConflictHeuristic(state, problem))
+
 EIGHT_PUZZLE_DATA = [[1, 0, 2, 3, 4, 5, 6, 7, 8],
                      [1, 7, 8, 2, 3, 4, 5, 6, 0],
                      [4, 3, 2, 7, 0, 5, 1, 6, 8],
@@ -248,28 +450,72 @@ def loadEightPuzzle(puzzleNumber):
     """
     return EightPuzzleState(EIGHT_PUZZLE_DATA[puzzleNumber])
 
-def createRandomEightPuzzle(moves=100):
+def createRandomEightPuzzle(moves=100, size=3):
     """
       moves: number of random moves to apply
+      size: number of rows of the puzzle, 4 for a fifteen puzzle
 
       Creates a random eight puzzle by applying
       a series of 'moves' random moves to a solved
       puzzle.
     """
-    puzzle = EightPuzzleState([0,1,2,3,4,5,6,7,8])
+    puzzle = EightPuzzleState(list(range(size * size)))
     for i in range(moves):
         # Execute a random legal move
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
     return puzzle
 
+def checkHeuristic(heuristic, numPuzzles=20, moves=25, size=3):
+    """
+      Solves numPuzzles random puzzles with A* and the heuristic and with BFS
+    and returns the puzzles (with both path lengths) where A* found a longer
+    path, which happens when the heuristic is not admissible or consistent.
+    """
+    wrong = []
+    for i in range(numPuzzles):
+        puzzle = createRandomEightPuzzle(moves, size)
+        optimal = len(search.breadthFirstSearch(EightPuzzleSearchProblem(puzzle)))
+        found = len(search.aStarSearch(EightPuzzleSearchProblem(puzzle), heuristic))
+        if found != optimal:
+            wrong.append((puzzle, found, optimal))
+    return wrong
+
 if __name__ == '__main__':
-    puzzle = createRandomEightPuzzle(25)
+    from optparse import OptionParser
+    parser = OptionParser('python eightpuzzle.py <options>')
+    parser.add_option('-s', '--size', dest='size', type='int', default=3,
+                      help='number of rows of the puzzle, 4 for a fifteen puzzle [Default: %default]')
+    parser.add_option('-m', '--moves', dest='moves', type='int', default=25,
+                      help='number of random moves applied to the solved puzzle [Default: %default]')
+    parser.add_option('-H', '--heuristic', dest='heuristic', default=None,
+                      help='heuristic of this file used by A*, BFS is used without one')
+    parser.add_option('--cacheDir', dest='cacheDir', default=None,
+                      help='directory where the pattern databases are stored')
+    parser.add_option('-c', '--check', dest='check', type='int', default=0,
+                      help='compares the A* path lengths of the heuristic with BFS on CHECK random puzzles',
+                      metavar='CHECK')
+    options, otherjunk = parser.parse_args()
+
+    if options.check:
+        heuristic = globals()[options.heuristic or 'patternDatabaseHeuristic']
+        wrong = checkHeuristic(heuristic, options.check, options.moves, options.size)
+        for puzzle, found, optimal in wrong:
+            print('A* found %d moves instead of %d for %s' % (found, optimal, puzzle.getTiles()))
+        print('%d/%d puzzles solved optimally' % (options.check - len(wrong), options.check))
+        sys.exit(len(wrong) > 0)
+
+    puzzle = createRandomEightPuzzle(options.moves, options.size)
     print('A random puzzle:')
     print(puzzle)
 
-    problem = EightPuzzleSearchProblem(puzzle)
-    path = search.breadthFirstSearch(problem)
-    print('BFS found a path of %d moves: %s' % (len(path), str(path)))
+    problem = EightPuzzleSearchProblem(puzzle, cacheDir=options.cacheDir)
+    if options.heuristic is None:
+        path = search.breadthFirstSearch(problem)
+        print('BFS found a path of %d moves: %s' % (len(path), str(path)))
+    else:
+        path = search.aStarSearch(problem, globals()[options.heuristic])
+        print('A* found a path of %d moves: %s' % (len(path), str(path)))
+    print(problem.searchStats)
     curr = puzzle
     i = 1
     for a in path:
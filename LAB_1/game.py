@@ -22,6 +22,8 @@
 
 from util import *
 import time, os
+import struct
+import random
 import traceback
 import sys
 
@@ -74,7 +76,11 @@ class Configuration:
 
     The convention for positions, like a graph, is that (0,0) is the lower left corner, x increases
     horizontally and y increases vertically.  Therefore, north is the direction of increasing y, or (0,1).
+
+    Configurations are immutable, so game states can share them: moving a
+    character creates a new Configuration.
     """
+    __slots__ = ('pos', 'direction')
 
     def __init__(self, pos, direction):
         self.pos = pos
@@ -161,9 +167,14 @@ class AgentState:
 
 class Grid:
     """
-    A 2-dimensional array of objects backed by a list of lists.  Data is accessed
-    via grid[x][y] where (x,y) are positions on a Pacman map with x horizontal,
-    y vertical and the origin (0,0) in the bottom left corner.
+    A 2-dimensional array of booleans backed by the bits of a single integer.
+    Data is accessed via grid[x][y] where (x,y) are positions on a Pacman map
+    with x horizontal, y vertical and the origin (0,0) in the bottom left
+    corner.
+
+    Cell (x,y) is bit x * height + y of the integer, so copies share the
+    (immutable) integer and take constant time, and the number of True cells
+    and the hash are maintained as cells change instead of being recomputed.
 
     The __str__ method constructs an output that is oriented like a pacman board.
     """
@@ -173,57 +184,99 @@ class Grid:
 
         self.width = width
         self.height = height
-        self.data = [[initialValue for y in range(height)] for x in range(width)]
+        if initialValue:
+            self._bits = (1 << (width * height)) - 1
+            self._count = width * height
+        else:
+            self._bits = 0
+            self._count = 0
+        self._hash = None
         if bitRepresentation:
             self._unpackBits(bitRepresentation)
 
     def __getitem__(self, i):
-        return self.data[i]
+        if i < 0:
+            i += self.width
+        if not 0 <= i < self.width:
+            raise IndexError('Grid column index out of range')
+        return GridColumn(self, i * self.height)
 
     def __setitem__(self, key, item):
-        self.data[key] = item
+        column = self[key]
+        for y, value in enumerate(item):
+            column[y] = value
+
+    def __iter__(self):
+        for x in range(self.width):
+            yield GridColumn(self, x * self.height)
+
+    def __len__(self):
+        return self.width
+
+    def get(self, x, y):
+        "Returns the value of cell (x,y), like grid[x][y]"
+        return (self._bits >> (x * self.height + y)) & 1 == 1
+
+    def set(self, x, y, value):
+        "Sets the value of cell (x,y), like grid[x][y] = value"
+        self._setBit(x * self.height + y, value)
+
+    def _setBit(self, index, value):
+        bit = 1 << index
+        if value:
+            if not self._bits & bit:
+                self._bits |= bit
+                self._count += 1
+                self._hash = None
+        elif self._bits & bit:
+            self._bits &= ~bit
+            self._count -= 1
+            self._hash = None
 
     def __str__(self):
-        out = [[str(self.data[x][y])[0] for x in range(self.width)] for y in range(self.height)]
+        out = [['T' if self.get(x, y) else 'F' for x in range(self.width)] for y in range(self.height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
 
     def __eq__(self, other):
         if other == None: return False
-        return self.data == other.data
+        return self._bits == other._bits and self.width == other.width and self.height == other.height
 
     def __hash__(self):
-        # return hash(str(self))
-        base = 1
-        h = 0
-        for l in self.data:
-            for i in l:
-                if i:
-                    h += base
-                base *= 2
-        return hash(h)
+        # The integer of the bits, as before, but only hashed after a change
+        if self._hash is None:
+            self._hash = hash(self._bits)
+        return self._hash
 
     def copy(self):
-        g = Grid(self.width, self.height)
-        g.data = [x[:] for x in self.data]
+        g = Grid.__new__(Grid)
+        g.CELLS_PER_INT = self.CELLS_PER_INT
+        g.width, g.height = self.width, self.height
+        g._bits, g._count, g._hash = self._bits, self._count, self._hash
         return g
 
     def deepCopy(self):
         return self.copy()
 
     def shallowCopy(self):
-        g = Grid(self.width, self.height)
-        g.data = self.data
-        return g
+        # The bits are immutable, so a copy is as cheap as sharing them
+        return self.copy()
 
     def count(self, item =True ):
-        return sum([x.count(item) for x in self.data])
+        if item:
+            return self._count
+        return self.width * self.height - self._count
 
     def asList(self, key = True):
+        bits = self._bits if key else ~self._bits & ((1 << (self.width * self.height)) - 1)
         list = []
-        for x in range(self.width):
-            for y in range(self.height):
-                if self[x][y] == key: list.append( (x,y) )
+        height = self.height
+        # Only the set bits are visited, lowest (x, then y) first
+        while bits:
+            lowest = bits & -bits
+            index = lowest.bit_length() - 1
+            list.append( (index // height, index % height) )
+            bits ^= lowest
         return list
 
     def packBits(self):
@@ -231,19 +284,34 @@ class Grid:
         Returns an efficient int list representation
 
         (width, height, bitPackedInts...)
+
+        Each int packs CELLS_PER_INT cells, the first one in its most
+        significant bit, and the last int is always present.
+        """
+        numCells = self.width * self.height
+        size = self.CELLS_PER_INT
+        # Cells in order as a string of binary digits, padded to whole ints
+        cells = format(self._bits, '0%db' % numCells)[::-1] if numCells else ''
+        cells += '0' * (size - numCells % size)
+        ints = [int(cells[i:i + size], 2) for i in range(0, len(cells), size)]
+        return tuple([self.width, self.height] + ints)
+
+    def toBytes(self):
+        """
+        Returns a compact bytes representation: width and height as two
+        little-endian 16 bit integers followed by the bits of the cells.
         """
-        bits = [self.width, self.height]
-        currentInt = 0
-        for i in range(self.height * self.width):
-            bit = self.CELLS_PER_INT - (i % self.CELLS_PER_INT) - 1
-            x, y = self._cellIndexToPosition(i)
-            if self[x][y]:
-                currentInt += 2 ** bit
-            if (i + 1) % self.CELLS_PER_INT == 0:
-                bits.append(currentInt)
-                currentInt = 0
-        bits.append(currentInt)
-        return tuple(bits)
+        numCells = self.width * self.height
+        return struct.pack('<HH', self.width, self.height) + self._bits.to_bytes((numCells + 7) // 8, 'little')
+
+    def fromBytes(data):
+        "Returns the Grid of a representation made by toBytes"
+        width, height = struct.unpack('<HH', data[:4])
+        g = Grid(width, height)
+        g._bits = int.from_bytes(data[4:], 'little') & ((1 << (width * height)) - 1)
+        g._count = bin(g._bits).count('1')
+        return g
+    fromBytes = staticmethod(fromBytes)
 
     def _cellIndexToPosition(self, index):
         x = index // self.height
@@ -254,27 +322,56 @@ class Grid:
         """
         Fills in data from a bit-level representation
         """
-        cell = 0
+        numCells = self.width * self.height
         for packed in bits:
-            for bit in self._unpackInt(packed, self.CELLS_PER_INT):
-                if cell == self.width * self.height: break
-                x, y = self._cellIndexToPosition(cell)
-                self[x][y] = bit
-                cell += 1
-
-    def _unpackInt(self, packed, size):
-        bools = []
-        if packed < 0: raise ValueError("must be a positive integer")
-        for i in range(size):
-            n = 2 ** (self.CELLS_PER_INT - i - 1)
-            if packed >= n:
-                bools.append(True)
-                packed -= n
-            else:
-                bools.append(False)
-        return bools
+            if packed < 0: raise ValueError("must be a positive integer")
+        cells = ''.join([format(packed, '0%db' % self.CELLS_PER_INT) for packed in bits])[:numCells]
+        self._bits = int(cells[::-1], 2) if cells else 0
+        self._count = cells.count('1')
+        self._hash = None
+
+class GridColumn:
+    """
+    The column of a Grid returned by grid[x], so that grid[x][y] reads and
+    writes the bits of the grid.
+    """
+    __slots__ = ('grid', 'offset')
+
+    def __init__(self, grid, offset):
+        self.grid = grid
+        self.offset = offset
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.grid.height
+        if not 0 <= y < self.grid.height:
+            raise IndexError('Grid row index out of range')
+        return (self.grid._bits >> (self.offset + y)) & 1 == 1
+
+    def __setitem__(self, y, value):
+        if y < 0:
+            y += self.grid.height
+        if not 0 <= y < self.grid.height:
+            raise IndexError('Grid row index out of range')
+        self.grid._setBit(self.offset + y, value)
+
+    def __iter__(self):
+        bits = self.grid._bits >> self.offset
+        for y in range(self.grid.height):
+            yield (bits >> y) & 1 == 1
+
+    def __len__(self):
+        return self.grid.height
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def count(self, item=True):
+        return list(self).count(item)
 
 def reconstituteGrid(bitRep):
+    if type(bitRep) is bytes:
+        return Grid.fromBytes(bitRep)
     if type(bitRep) is not type((1,2)):
         return bitRep
     width, height = bitRep[:2]
@@ -342,7 +439,7 @@ class Actions:
             dx, dy = vec
             next_y = y_int + dy
             next_x = x_int + dx
-            if not walls[next_x][next_y]: possible.append(dir)
+            if not walls.get(next_x, next_y): possible.append(dir)
 
         return possible
 
@@ -358,7 +455,7 @@ class Actions:
             if next_x < 0 or next_x == walls.width: continue
             next_y = y_int + dy
             if next_y < 0 or next_y == walls.height: continue
-            if not walls[next_x][next_y]: neighbors.append((next_x, next_y))
+            if not walls.get(next_x, next_y): neighbors.append((next_x, next_y))
         return neighbors
     getLegalNeighbors = staticmethod(getLegalNeighbors)
 
@@ -368,21 +465,49 @@ class Actions:
         return (x + dx, y + dy)
     getSuccessor = staticmethod(getSuccessor)
 
+# Random 64-bit keys of the Zobrist hashes of GameStateData, created the first
+# time each food dot, capsule or agent state is seen
+ZOBRIST_KEYS = {}
+ZOBRIST_RANDOM = random.Random(0)
+ZOBRIST_MASK = (1 << 64) - 1
+
+def zobristKey(item):
+    key = ZOBRIST_KEYS.get(item)
+    if key is None:
+        key = ZOBRIST_KEYS[item] = ZOBRIST_RANDOM.getrandbits(64)
+    return key
+
+def agentZobristKey(index, agentState):
+    configuration = agentState.configuration
+    if configuration == None:
+        return zobristKey(('agent', index, None))
+    return zobristKey(('agent', index, configuration.pos, configuration.direction,
+                       agentState.scaredTimer))
+
 class GameStateData:
     """
-
+    The food, capsules, agent states and score of a game.  It keeps a Zobrist
+    hash of the food, capsules and agent states that the rules update as they
+    change them, so hashing and comparing states does not look at the food.
     """
     def __init__( self, prevState = None ):
         """
         Generates a new data packet by copying information from its predecessor.
         """
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates( prevState.agentStates )
+            # The food, capsules, agent states and _eaten are shared with the
+            # predecessor; the rules replace them with copies before changing
+            # them (see getMutableAgentState)
+            self.food = prevState.food
+            self.capsules = prevState.capsules
+            self.agentStates = prevState.agentStates
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
+            self._copiedAgentStates = None
+            if prevState._movedAgents: prevState.updateHash()
+            self._zobrist = prevState._zobrist
+        self._movedAgents = None
 
         self._foodEaten = None
         self._foodAdded = None
@@ -395,6 +520,10 @@ class GameStateData:
     def deepCopy( self ):
         state = GameStateData( self )
         state.food = self.food.deepCopy()
+        state.capsules = self.capsules[:]
+        state.agentStates = self.copyAgentStates( self.agentStates )
+        state._copiedAgentStates = set( range( len( state.agentStates ) ) )
+        state._eaten = self._eaten[:]
         state.layout = self.layout.deepCopy()
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
@@ -402,6 +531,65 @@ class GameStateData:
         state._capsuleEaten = self._capsuleEaten
         return state
 
+    def getMutableAgentState( self, index ):
+        """
+        Returns agentStates[index] so that it can be changed, copying it (and
+        the list of agent states) first if it is still shared with the
+        predecessor of this state.
+
+        The key of the agent state is taken out of the hash until updateHash
+        puts back the key of its new value.
+        """
+        if self._copiedAgentStates is None:
+            self.agentStates = self.agentStates[:]
+            self._copiedAgentStates = set()
+        if index not in self._copiedAgentStates:
+            self.agentStates[index] = self.agentStates[index].copy()
+            self._copiedAgentStates.add( index )
+        if self._movedAgents is None:
+            self._movedAgents = set()
+        if index not in self._movedAgents:
+            self._zobrist ^= agentZobristKey( index, self.agentStates[index] )
+            self._movedAgents.add( index )
+        return self.agentStates[index]
+
+    def removeFood( self, x, y ):
+        "Removes the food at (x, y), copying the grid shared with the predecessor"
+        self.food = self.food.copy()
+        self.food[x][y] = False
+        self._zobrist ^= zobristKey( ('food', x, y) )
+
+    def removeCapsule( self, position ):
+        "Removes a capsule, copying the list shared with the predecessor"
+        self.capsules = [capsule for capsule in self.capsules if capsule != position]
+        self._zobrist ^= zobristKey( ('capsule', position) )
+
+    def updateHash( self ):
+        """
+        Puts back in the hash the keys of the agent states changed since
+        getMutableAgentState took them out.
+        """
+        if self._movedAgents:
+            for index in self._movedAgents:
+                self._zobrist ^= agentZobristKey( index, self.agentStates[index] )
+        self._movedAgents = None
+
+    def computeHash( self ):
+        "Computes the Zobrist hash of the food, capsules and agents from scratch"
+        zobrist = 0
+        for x, y in self.food.asList():
+            zobrist ^= zobristKey( ('food', x, y) )
+        for capsule in self.capsules:
+            zobrist ^= zobristKey( ('capsule', capsule) )
+        for index, agentState in enumerate( self.agentStates ):
+            zobrist ^= agentZobristKey( index, agentState )
+        return zobrist
+
+    def getZobristHash( self ):
+        "Returns the 64-bit hash of the state, score included"
+        if self._movedAgents: self.updateHash()
+        return (self._zobrist ^ (int(self.score) * 0x9E3779B97F4A7C15)) & ZOBRIST_MASK
+
     def copyAgentStates( self, agentStates ):
         copiedStates = []
         for agentState in agentStates:
@@ -413,7 +601,9 @@ class GameStateData:
         Allows two states to be compared.
         """
         if other == None: return False
-        # TODO Check for type of other
+        if self is other: return True
+        # Different hashes are different states; equal ones are checked in full
+        if self.getZobristHash() != other.getZobristHash(): return False
         if not self.agentStates == other.agentStates: return False
         if not self.food == other.food: return False
         if not self.capsules == other.capsules: return False
@@ -424,23 +614,14 @@ class GameStateData:
         """
         Allows states to be keys of dictionaries.
         """
-        for i, state in enumerate( self.agentStates ):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                #hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113* hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575 )
+        return hash( self.getZobristHash() )
 
     def __str__( self ):
         width, height = self.layout.width, self.layout.height
-        map = Grid(width, height)
         if type(self.food) == type((1,2)):
             self.food = reconstituteGrid(self.food)
-        for x in range(width):
-            for y in range(height):
-                food, walls = self.food, self.layout.walls
-                map[x][y] = self._foodWallStr(food[x][y], walls[x][y])
+        food, walls = self.food, self.layout.walls
+        map = [[self._foodWallStr(food[x][y], walls[x][y]) for y in range(height)] for x in range(width)]
 
         for agentState in self.agentStates:
             if agentState == None: continue
@@ -455,7 +636,9 @@ class GameStateData:
         for x, y in self.capsules:
             map[x][y] = 'o'
 
-        return str(map) + ("\nScore: %d\n" % self.score)
+        rows = [''.join([map[x][y] for x in range(width)]) for y in range(height)]
+        rows.reverse()
+        return '\n'.join(rows) + ("\nScore: %d\n" % self.score)
 
     def _foodWallStr( self, hasFood, hasWall ):
         if hasFood:
@@ -502,7 +685,9 @@ class GameStateData:
                 if numGhosts == numGhostAgents: continue # Max ghosts reached already
                 else: numGhosts += 1
             self.agentStates.append( AgentState( Configuration( pos, Directions.STOP), isPacman) )
+        self._copiedAgentStates = set( range( len( self.agentStates ) ) )
         self._eaten = [False for a in self.agentStates]
+        self._zobrist = self.computeHash()
 
 try:
     import boinc
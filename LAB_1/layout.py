@@ -14,11 +14,17 @@
 
 from util import manhattanDistance
 from game import Grid
+from game import Directions
 import os
 import random
+import pickle
+import hashlib
+from array import array
 from functools import reduce
 
 VISIBILITY_MATRIX_CACHE = {}
+MAZE_DISTANCES_CACHE = {}
+NEIGHBOR_TABLE_CACHE = {}
 
 class Layout:
     """
@@ -62,6 +68,41 @@ class Layout:
         else:
             self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)]
 
+    def getMazeDistances(self, cacheDir=None):
+        """
+        Returns the MazeDistances of this layout.  They are computed once and
+        cached by layout text; if cacheDir is given they are also stored in
+        (and loaded from) a file of that directory.
+        """
+        key = str(self)
+        if key in MAZE_DISTANCES_CACHE:
+            return MAZE_DISTANCES_CACHE[key]
+        distances = None
+        if cacheDir is not None:
+            fileName = os.path.join(cacheDir, hashlib.md5(key.encode()).hexdigest() + '.mazeDistances')
+            if os.path.exists(fileName):
+                with open(fileName, 'rb') as f:
+                    distances = pickle.load(f)
+        if distances is None:
+            distances = MazeDistances(self.getNeighborTable())
+            if cacheDir is not None:
+                if not os.path.isdir(cacheDir):
+                    os.makedirs(cacheDir)
+                with open(fileName, 'wb') as f:
+                    pickle.dump(distances, f)
+        MAZE_DISTANCES_CACHE[key] = distances
+        return distances
+
+    def getNeighborTable(self):
+        """
+        Returns the NeighborTable of this layout, built once and cached by
+        layout text so that every search problem on the layout shares it.
+        """
+        key = str(self)
+        if key not in NEIGHBOR_TABLE_CACHE:
+            NEIGHBOR_TABLE_CACHE[key] = NeighborTable(self.walls)
+        return NEIGHBOR_TABLE_CACHE[key]
+
     def isWall(self, pos):
         x, col = pos
         return self.walls[x][col]
@@ -129,6 +170,91 @@ class Layout:
         elif layoutChar in  ['1', '2', '3', '4']:
             self.agentPositions.append( (int(layoutChar), (x,y)))
             self.numGhosts += 1
+
+
+class NeighborTable:
+    """
+    The legal moves from every cell of a maze.
+
+    Cell (x, y) has id x * height + y.  neighbors[id] is a tuple of
+    (neighborId, action) pairs in the order North, South, East, West (empty
+    for walls) and positions[id] is the (x, y) tuple of the cell, so a
+    successor function is a single tuple lookup instead of four vector
+    computations and wall probes.  freeCells holds the ids of the cells that
+    are not walls, in increasing order.
+    """
+
+    def __init__(self, walls):
+        self.width, self.height = walls.width, walls.height
+        self.positions = tuple((x, y) for x in range(self.width) for y in range(self.height))
+        moves = [(Directions.NORTH, 0, 1), (Directions.SOUTH, 0, -1),
+                 (Directions.EAST, 1, 0), (Directions.WEST, -1, 0)]
+        neighbors = []
+        freeCells = []
+        for x, y in self.positions:
+            cellNeighbors = []
+            if not walls[x][y]:
+                freeCells.append(x * self.height + y)
+                for action, dx, dy in moves:
+                    nextx, nexty = x + dx, y + dy
+                    if 0 <= nextx < self.width and 0 <= nexty < self.height and not walls[nextx][nexty]:
+                        cellNeighbors.append((nextx * self.height + nexty, action))
+            neighbors.append(tuple(cellNeighbors))
+        self.neighbors = tuple(neighbors)
+        self.freeCells = tuple(freeCells)
+
+    def cellId(self, pos):
+        x, y = pos
+        return x * self.height + y
+
+    def getNeighbors(self, pos):
+        "Returns the (neighborId, action) pairs of the free cells next to pos"
+        x, y = pos
+        return self.neighbors[x * self.height + y]
+
+
+class MazeDistances:
+    """
+    The shortest path distance between every pair of free cells of a maze.
+
+    The distances are computed by a breadth-first search from every free
+    cell over a NeighborTable and stored in a flat matrix of unsigned 16-bit
+    integers indexed by free cell index, the position of the cell id in
+    NeighborTable.freeCells, so getDistance is a constant time lookup.  Cells
+    that cannot reach each other are UNREACHABLE apart.
+    """
+    UNREACHABLE = 65535
+
+    def __init__(self, neighborTable):
+        self.height = neighborTable.height
+        freeCells = neighborTable.freeCells
+        self.numCells = n = len(freeCells)
+        self.freeCellIndex = dict((cellId, index) for index, cellId in enumerate(freeCells))
+        neighbors = [[self.freeCellIndex[neighborId] for neighborId, action in neighborTable.neighbors[cellId]]
+                     for cellId in freeCells]
+
+        self.distances = array('H', [self.UNREACHABLE]) * (n * n)
+        for source in range(n):
+            row = [self.UNREACHABLE] * n
+            row[source] = 0
+            layer, distance = [source], 0
+            while layer:
+                distance += 1
+                nextLayer = []
+                for cell in layer:
+                    for neighbor in neighbors[cell]:
+                        if row[neighbor] == self.UNREACHABLE:
+                            row[neighbor] = distance
+                            nextLayer.append(neighbor)
+                layer = nextLayer
+            self.distances[source * n:(source + 1) * n] = array('H', row)
+
+    def getDistance(self, pos1, pos2):
+        "Returns the maze distance between two free cells"
+        index1 = self.freeCellIndex[pos1[0] * self.height + pos1[1]]
+        index2 = self.freeCellIndex[pos2[0] * self.height + pos2[1]]
+        return self.distances[index1 * self.numCells + index2]
+
 def getLayout(name, back = 2):
     if name.endswith('.lay'):
         layout = tryToLoad('layouts/' + name)
@@ -18,8 +18,11 @@
 In search.py, you will implement generic search algorithms which are called by
 Pacman agents (in searchAgents.py).
 """
+import heapq
+import time
 import util
 from game import Directions
+from game import Actions
 
 
 class SearchProblem:
@@ -29,6 +32,12 @@ class SearchProblem:
     (in object-oriented terminology: an abstract class).
 
     You do not need to change anything in this class, ever.
+
+    The graph search algorithms below store the states returned by
+    getStartState and getSuccessors in a hashed closed set, so states should
+    be hashable and equal states must hash equally.  Problems whose states are
+    not hashable (e.g. they contain lists) can define a stateKey(state)
+    method returning a hashable canonical key; otherwise canonicalKey is used.
     """
 
     def getStartState(self):
@@ -66,6 +75,43 @@ class SearchProblem:
         util.raiseNotDefined()
 
 
+def canonicalKey(state):
+    """
+    Returns a hashable key for a search state that is not hashable itself.
+    Lists become tuples, sets become frozensets and dictionaries become
+    frozensets of their items, recursively.  Hashable values (for example a
+    Grid) are returned as they are.
+    """
+    try:
+        hash(state)
+        return state
+    except TypeError:
+        pass
+    if isinstance(state, (list, tuple)):
+        return tuple(canonicalKey(item) for item in state)
+    if isinstance(state, (set, frozenset)):
+        return frozenset(canonicalKey(item) for item in state)
+    if isinstance(state, dict):
+        return frozenset((canonicalKey(k), canonicalKey(v)) for k, v in state.items())
+    raise TypeError('Search state %s is not hashable and has no canonical key'
+                    % str(state))
+
+
+def getStateKeyFunction(problem):
+    """
+    Returns the function used to turn the states of problem into keys of the
+    closed set: problem.stateKey if the problem defines it, the identity if
+    its start state is hashable and canonicalKey otherwise.
+    """
+    if hasattr(problem, 'stateKey'):
+        return problem.stateKey
+    try:
+        hash(problem.getStartState())
+        return lambda state: state
+    except TypeError:
+        return canonicalKey
+
+
 def tinyMazeSearch(problem):
     """
     Returns a sequence of moves that solves tinyMaze.  For any other maze, the
@@ -76,57 +122,262 @@ def tinyMazeSearch(problem):
     return [s, s, w, s, w, w, s, w]
 
 
-def solveSimpleSearch(problem, opened_list):
+class SearchNode:
+    """
+    A node of the search tree.  Each node only stores the action that led to
+    it and a pointer to its parent, so generating a child does not copy the
+    path; the list of actions is rebuilt once, by getPath, when the goal is
+    found.
+    """
+    __slots__ = ('state', 'parent', 'action', 'cost', 'depth')
+
+    def __init__(self, state, parent=None, action=None, cost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost
+        self.depth = 0 if parent is None else parent.depth + 1
+
+    def getPath(self):
+        "Returns the list of actions that leads from the root to this node"
+        path = [None] * self.depth
+        node = self
+        while node.parent is not None:
+            path[node.depth - 1] = node.action
+            node = node.parent
+        return path
+
+
+class SearchStats:
+    """
+    Statistics of a run of one of the search algorithms of this file.  Every
+    algorithm stores them in problem.searchStats, next to the path it
+    returns, so they can be inspected after the search.
+
+      generated:      number of successors generated
+      expanded:       number of nodes expanded
+      reexpanded:     number of expansions of states that had already been
+                      expanded (only the memory bounded algorithms, IDA*
+                      and SMA*, re-expand states)
+      maxFrontier:    peak number of nodes in the open list
+      maxClosed:      peak number of states in the closed list
+      heuristicCalls: number of evaluations of the heuristic
+      heuristicTime:  seconds spent evaluating the heuristic
+      successorTime:  seconds spent in problem.getSuccessors
+      totalTime:      seconds spent by the whole search
+      pathCost:       cost of the path found, None if none was found
+      suboptimalityBound:
+                      factor by which pathCost may exceed the optimal cost
+                      when the heuristic is admissible and consistent, set
+                      by the suboptimal searches (weighted A*, greedy and
+                      beam search), None otherwise
+      timeLimit:      seconds the search may last, None for no limit
+      nodeLimit:      nodes the search may expand, None for no limit
+      exhausted:      whether the search stopped because it ran out of
+                      its time or node budget
+    """
+
+    def __init__(self, timeLimit=None, nodeLimit=None):
+        self.generated = 0
+        self.expanded = 0
+        self.reexpanded = 0
+        self.maxFrontier = 0
+        self.maxClosed = 0
+        self.heuristicCalls = 0
+        self.heuristicTime = 0.0
+        self.successorTime = 0.0
+        self.totalTime = 0.0
+        self.pathCost = None
+        self.suboptimalityBound = None
+        self.timeLimit = None if timeLimit is None else float(timeLimit)
+        self.nodeLimit = None if nodeLimit is None else int(nodeLimit)
+        self.exhausted = False
+        self.startTime = time.perf_counter()
+
+    def overBudget(self):
+        "Returns whether the time or node budget of the search is spent"
+        if self.nodeLimit is not None and self.expanded >= self.nodeLimit:
+            self.exhausted = True
+        elif self.timeLimit is not None and time.perf_counter() - self.startTime >= self.timeLimit:
+            self.exhausted = True
+        return self.exhausted
+
+    def timeHeuristic(self, heuristic):
+        "Returns heuristic wrapped so that its calls are counted and timed"
+        def timedHeuristic(state, problem):
+            start = time.perf_counter()
+            value = heuristic(state, problem)
+            self.heuristicTime += time.perf_counter() - start
+            self.heuristicCalls += 1
+            return value
+        return timedHeuristic
+
+    def getSuccessors(self, problem, node, onExpand=None, backward=False):
+        """
+        Expands node: counts and times the call to problem.getSuccessors (or
+        problem.getPredecessors if backward is True) and calls
+        onExpand(node, stats) if a hook was given.
+        """
+        self.expanded += 1
+        if onExpand is not None:
+            onExpand(node, self)
+        start = time.perf_counter()
+        if backward:
+            successors = problem.getPredecessors(node.state)
+        else:
+            successors = problem.getSuccessors(node.state)
+        self.successorTime += time.perf_counter() - start
+        self.generated += len(successors)
+        return successors
+
+    def finish(self, node):
+        "Records the end of the search, node is the goal node or None"
+        self.totalTime = time.perf_counter() - self.startTime
+        if node is not None:
+            self.pathCost = node.cost
+            return node.getPath()
+        return None
+
+    def __str__(self):
+        lines = ['Nodes generated: %d' % self.generated,
+                 'Nodes expanded: %d (%d re-expanded)' % (self.expanded, self.reexpanded),
+                 'Peak frontier size: %d' % self.maxFrontier,
+                 'Peak closed size: %d' % self.maxClosed,
+                 'Heuristic calls: %d (%.3f seconds)' % (self.heuristicCalls, self.heuristicTime),
+                 'Successor generation: %.3f seconds' % self.successorTime,
+                 'Total search time: %.3f seconds' % self.totalTime]
+        if self.exhausted:
+            lines.append('Search budget exhausted')
+        if self.suboptimalityBound is not None:
+            lines.append('Suboptimality bound: %s' % self.suboptimalityBound)
+        return '\n'.join(lines)
+
+
+def solveSimpleSearch(problem, opened_list, onExpand=None, stats=None):
     """This method solves simple uninformed search algorithms which
-        reuse same code. These algorithms are DFS, BFS, UCS and A*
+        reuse same code. These algorithms are DFS and BFS.  The search
+        gives up, returning None, when the budget of stats is spent.
 
 
     Args:
         problem: problem to solve
         opened_list: name of the data structure of util.py which will be used
+        onExpand: optional function called as onExpand(node, stats) before
+            every expansion
+        stats: SearchStats to fill in, a new one is created by default
     """
+    if stats is None:
+        stats = SearchStats()
+    problem.searchStats = stats
     start_state = problem.getStartState()
+    state_key = getStateKeyFunction(problem)
 
     # Initialize the opened-list with root-node
-    opened_list.push([start_state, None, 0, []]) # [Starting state, Last action, Cost, Path]
+    opened_list.push(SearchNode(start_state))
 
-    # Initialize the closed-list as an empty list
-    closed_list = []
+    # Initialize the closed-list as an empty set of state keys
+    closed_set = set()
 
     # Iterating
     while True:
-        # If the open list is empty error
-        if opened_list.isEmpty():
-            return None
+        # If the open list is empty or the budget is spent error
+        if opened_list.isEmpty() or stats.overBudget():
+            return stats.finish(None)
 
         # Getting the node from the opened list
         current_node = opened_list.pop()
 
         # Checking if this is the goal
-        if problem.isGoalState(current_node[0]):
-            return current_node[-1]
+        if problem.isGoalState(current_node.state):
+            return stats.finish(current_node)
 
         # If the node is not in the closed list we add it and
         # we expand it and we add it to the closed list
-        if not any(current_node[0] == node[0] for node in closed_list):
-            closed_list.append(current_node)
-            # Iterating through the successors and adding them to the open list
-            for child in problem.getSuccessors(current_node[0]):
-                child_node = list(child)
+        current_key = state_key(current_node.state)
+        if current_key not in closed_set:
+            closed_set.add(current_key)
+            stats.maxClosed = len(closed_set)
+            # Iterating through the successors and adding them to the open
+            # list, the child only points to its parent instead of copying
+            # the path and accumulates the cost to get there
+            cost = current_node.cost
+            opened_list.pushMany([SearchNode(child_state, current_node, action, cost + step_cost)
+                                  for child_state, action, step_cost
+                                  in stats.getSuccessors(problem, current_node, onExpand)])
+            if len(opened_list) > stats.maxFrontier:
+                stats.maxFrontier = len(opened_list)
+
+
+def solveBestFirstSearch(problem, priority_function, opened_list=None, onExpand=None, stats=None):
+    """This method solves the best-first search algorithms, UCS and A*.
+        Unlike solveSimpleSearch every state is at most once in the open
+        list: when a cheaper path to a state of the open list is found its
+        node is replaced and its priority decreased.  The search gives up,
+        returning None, when the budget of stats is spent.
+
 
-                # Adding to the child the route to get there
-                # child path = current node path + action to get to the node
-                child_node.append(current_node[-1])
-                child_node[-1] = current_node[-1] + [child[1]]
+    Args:
+        problem: problem to solve
+        priority_function: function from a SearchNode to its priority
+        opened_list: util.IndexedPriorityQueue used as open list, by default
+            an indexed binary heap
+        onExpand: optional function called as onExpand(node, stats) before
+            every expansion
+        stats: SearchStats to fill in, a new one is created by default
+    """
+    if stats is None:
+        stats = SearchStats()
+    problem.searchStats = stats
+    start_state = problem.getStartState()
+    state_key = getStateKeyFunction(problem)
+    if opened_list is None:
+        opened_list = util.IndexedPriorityQueue()
 
-                # Adding to the child the accumulated cost
-                child_node[2] += current_node[2]
+    # Initialize the opened-list with the key of the root-node, the nodes
+    # themselves are kept in a dictionary indexed by the key of their state
+    start_node = SearchNode(start_state)
+    start_key = state_key(start_state)
+    opened_nodes = {start_key: start_node}
+    opened_list.push(start_key, priority_function(start_node))
 
-                # Adding the node to the closed list
-                opened_list.push(child_node)
+    # Initialize the closed-list as an empty set of state keys
+    closed_set = set()
 
+    while not opened_list.isEmpty():
+        if stats.overBudget():
+            return stats.finish(None)
 
-def depthFirstSearch(problem):
+        # Getting the best node from the opened list
+        current_key = opened_list.pop()
+        current_node = opened_nodes.pop(current_key)
+
+        # Checking if this is the goal
+        if problem.isGoalState(current_node.state):
+            return stats.finish(current_node)
+
+        closed_set.add(current_key)
+        stats.maxClosed = len(closed_set)
+        cost = current_node.cost
+        for child_state, action, step_cost in stats.getSuccessors(problem, current_node, onExpand):
+            child_key = state_key(child_state)
+            if child_key in closed_set:
+                continue
+
+            # Only a child that improves the best known path to its state
+            # replaces the node in the opened list
+            previous_node = opened_nodes.get(child_key)
+            if previous_node is None or cost + step_cost < previous_node.cost:
+                child_node = SearchNode(child_state, current_node, action, cost + step_cost)
+                opened_nodes[child_key] = child_node
+                opened_list.update(child_key, priority_function(child_node))
+        if len(opened_list) > stats.maxFrontier:
+            stats.maxFrontier = len(opened_list)
+
+    # If the open list is empty error
+    return stats.finish(None)
+
+
+def depthFirstSearch(problem, onExpand=None, timeLimit=None, nodeLimit=None):
     """
     Search the deepest nodes in the search tree first.
 
@@ -136,21 +387,21 @@ def depthFirstSearch(problem):
     To get started, you might want to try some of these simple commands to
     understand the search problem that is being passed in:
     """
-    return solveSimpleSearch(problem, util.Stack())
+    return solveSimpleSearch(problem, util.Stack(), onExpand, SearchStats(timeLimit, nodeLimit))
 
 
-def breadthFirstSearch(problem):
+def breadthFirstSearch(problem, onExpand=None, timeLimit=None, nodeLimit=None):
     """Search the shallowest nodes in the search tree first."""
-    return solveSimpleSearch(problem, util.Queue())
+    return solveSimpleSearch(problem, util.Queue(), onExpand, SearchStats(timeLimit, nodeLimit))
 
 
-def uniformCostSearch(problem):
+def uniformCostSearch(problem, onExpand=None, timeLimit=None, nodeLimit=None):
     """Search the node of least total cost first."""
-    # priorityFunction = lambda state: state[2]
-    def priorityFunction(state):
-        return state[2]
-    openlist = util.PriorityQueueWithFunction(priorityFunction)
-    return solveSimpleSearch(problem, openlist)
+    # priorityFunction = lambda node: node.cost
+    def priorityFunction(node):
+        return node.cost
+    return solveBestFirstSearch(problem, priorityFunction, onExpand=onExpand,
+                                stats=SearchStats(timeLimit, nodeLimit))
 
 
 def nullHeuristic(state, problem=None):
@@ -162,14 +413,671 @@ def nullHeuristic(state, problem=None):
     return 0
 
 
-def aStarSearch(problem, heuristic=nullHeuristic):
+def cachedHeuristic(heuristic, maxSize=100000, onMiss=None):
+    """
+    Returns a memoized version of heuristic.  The values are kept in a
+    util.LRUCache of at most maxSize entries, keyed by the canonical key of
+    each state and stored in problem.heuristicInfo['heuristicCache'], so the
+    heuristic is computed once per distinct state, also across searches on
+    the same problem, and the hit rate of the cache can be inspected after
+    the search.
+
+    If onMiss is given, the heuristic is evaluated on cache misses through
+    onMiss(heuristic), e.g. SearchStats.timeHeuristic to count and time only
+    the real evaluations.
+    """
+    evaluate = heuristic if onMiss is None else onMiss(heuristic)
+    def memoizedHeuristic(state, problem):
+        if not hasattr(problem, 'heuristicInfo'):
+            problem.heuristicInfo = {}
+        cache = problem.heuristicInfo.get('heuristicCache')
+        if cache is None or cache.heuristic is not heuristic:
+            cache = util.LRUCache(maxSize)
+            cache.heuristic = heuristic
+            cache.stateKey = getStateKeyFunction(problem)
+            problem.heuristicInfo['heuristicCache'] = cache
+        key = cache.stateKey(state)
+        value = cache.get(key)
+        if value is None:
+            value = evaluate(state, problem)
+            cache.put(key, value)
+        return value
+    return memoizedHeuristic
+
+
+def aStarSearch(problem, heuristic=nullHeuristic, cacheSize=0, onExpand=None,
+                timeLimit=None, nodeLimit=None):
     """Search the node that has the lowest
-    combined cost and heuristic first."""
-    # priorityFunction = lambda state: state[2] + heuristic(state[0], problem)
-    def priority_function(state):
-        return state[2] + heuristic(state[0], problem)
-    opened_list = util.PriorityQueueWithFunction(priority_function)
-    return solveSimpleSearch(problem, opened_list)
+    combined cost and heuristic first.
+
+    If cacheSize is given, the heuristic values of the last cacheSize
+    distinct states are memoized (see cachedHeuristic)."""
+    stats = SearchStats(timeLimit, nodeLimit)
+    # Only the real evaluations of the heuristic are counted, not cache hits
+    if cacheSize:
+        heuristic = cachedHeuristic(heuristic, int(cacheSize), stats.timeHeuristic)
+    else:
+        heuristic = stats.timeHeuristic(heuristic)
+    # priorityFunction = lambda node: node.cost + heuristic(node.state, problem)
+    def priority_function(node):
+        return node.cost + heuristic(node.state, problem)
+    return solveBestFirstSearch(problem, priority_function, onExpand=onExpand, stats=stats)
+
+
+def weightedAStarSearch(problem, heuristic=nullHeuristic, w=2, cacheSize=0, onExpand=None,
+                        timeLimit=None, nodeLimit=None):
+    """Weighted A*: search the node with the lowest cost plus w times the
+    heuristic first.  With w > 1 it expands fewer nodes than A*, and with a
+    consistent heuristic the cost of the path is at most w times the optimal
+    one."""
+    stats = SearchStats(timeLimit, nodeLimit)
+    if cacheSize:
+        heuristic = cachedHeuristic(heuristic, int(cacheSize), stats.timeHeuristic)
+    else:
+        heuristic = stats.timeHeuristic(heuristic)
+    stats.suboptimalityBound = float(w)
+    def priority_function(node):
+        return node.cost + w * heuristic(node.state, problem)
+    return solveBestFirstSearch(problem, priority_function, onExpand=onExpand, stats=stats)
+
+
+def greedyBestFirstSearch(problem, heuristic=nullHeuristic, cacheSize=0, onExpand=None,
+                          timeLimit=None, nodeLimit=None):
+    """Search the node with the lowest heuristic first, ignoring the cost
+    of the path.  The cost of the path is not bounded."""
+    stats = SearchStats(timeLimit, nodeLimit)
+    if cacheSize:
+        heuristic = cachedHeuristic(heuristic, int(cacheSize), stats.timeHeuristic)
+    else:
+        heuristic = stats.timeHeuristic(heuristic)
+    stats.suboptimalityBound = float('inf')
+    def priority_function(node):
+        return heuristic(node.state, problem)
+    return solveBestFirstSearch(problem, priority_function, onExpand=onExpand, stats=stats)
+
+
+def anytimeWeightedAStarSearch(problem, heuristic=nullHeuristic, w=5, decrement=1,
+                               onExpand=None, timeLimit=None, nodeLimit=None):
+    """Anytime weighted A*: a series of weighted A* searches whose weight
+    starts at w and drops by decrement after every solution, down to 1, so
+    a first path is found fast and then improved while the time and node
+    budget last.  Returns the cheapest path found; if the budget ran out
+    before any, the path to the generated state of lowest heuristic, so
+    that an agent can at least get closer to the goal.  The heuristic
+    values are cached between searches."""
+    stats = SearchStats(timeLimit, nodeLimit)
+    heuristic = cachedHeuristic(heuristic, onMiss=stats.timeHeuristic)
+    closest = [None, None]  # (heuristic, cost) and node closest to the goal
+    best_path, best_cost, best_weight = None, None, None
+
+    weight = float(w)
+    while True:
+        def priority_function(node, weight=weight):
+            h = heuristic(node.state, problem)
+            if closest[0] is None or (h, node.cost) < closest[0]:
+                closest[0], closest[1] = (h, node.cost), node
+            return node.cost + weight * h
+        path = solveBestFirstSearch(problem, priority_function, onExpand=onExpand, stats=stats)
+
+        # No path means that there is none or that the budget is spent
+        if path is None:
+            break
+        if best_cost is None or stats.pathCost < best_cost:
+            best_path, best_cost = path, stats.pathCost
+        best_weight = weight
+        if weight <= 1:
+            break
+        weight = max(1.0, weight - decrement)
+
+    stats.pathCost, stats.suboptimalityBound = best_cost, best_weight
+    if best_path is None and stats.exhausted and closest[1] is not None:
+        stats.suboptimalityBound = float('inf')
+        return closest[1].getPath()
+    return best_path
+
+
+def beamSearch(problem, heuristic=nullHeuristic, width=100, onExpand=None,
+               timeLimit=None, nodeLimit=None):
+    """Beam search: a breadth-first search that only keeps the width nodes
+    of lowest cost plus heuristic of every layer.  The memory is bounded by
+    width, but the search is incomplete and the cost of the path is not
+    bounded."""
+    stats = SearchStats(timeLimit, nodeLimit)
+    stats.suboptimalityBound = float('inf')
+    problem.searchStats = stats
+    heuristic = stats.timeHeuristic(heuristic)
+    state_key = getStateKeyFunction(problem)
+    width = int(width)
+
+    start_state = problem.getStartState()
+    layer = [SearchNode(start_state)]
+    closed_set = {state_key(start_state)}
+    while layer:
+        # The layer is sorted, so the first goal is the one of lowest f
+        for node in layer:
+            if problem.isGoalState(node.state):
+                return stats.finish(node)
+
+        # Generating the next layer, keeping the best node of every state
+        children = {}
+        for node in layer:
+            if stats.overBudget():
+                return stats.finish(None)
+            cost = node.cost
+            for child_state, action, step_cost in stats.getSuccessors(problem, node, onExpand):
+                child_key = state_key(child_state)
+                if child_key in closed_set:
+                    continue
+                previous = children.get(child_key)
+                if previous is None or cost + step_cost < previous[1].cost:
+                    child_node = SearchNode(child_state, node, action, cost + step_cost)
+                    children[child_key] = (child_node.cost + heuristic(child_state, problem), child_node)
+        if len(children) > stats.maxFrontier:
+            stats.maxFrontier = len(children)
+
+        # Only the best width nodes survive, the others are forgotten
+        best = heapq.nsmallest(width, children.items(), key=lambda item: item[1][0])
+        closed_set.update(child_key for child_key, _ in best)
+        stats.maxClosed = len(closed_set)
+        layer = [child_node for _, (_, child_node) in best]
+
+    # If the beam runs out of nodes error
+    return stats.finish(None)
+
+
+def iterativeDeepeningAStarSearch(problem, heuristic=nullHeuristic, onExpand=None,
+                                  timeLimit=None, nodeLimit=None):
+    """Iterative-deepening A* (IDA*): a series of depth-first searches
+    that prune every node whose f = g + h exceeds a bound, the bound of each
+    iteration being the smallest f pruned by the previous one.  Only the
+    current path is kept in memory, at the price of re-expanding states."""
+    stats = problem.searchStats = SearchStats(timeLimit, nodeLimit)
+    heuristic = stats.timeHeuristic(heuristic)
+    state_key = getStateKeyFunction(problem)
+    start_state = problem.getStartState()
+    root = SearchNode(start_state)
+    root_key = state_key(start_state)
+    bound = heuristic(start_state, problem)
+    previous_bound = -1
+
+    while bound != float('inf'):
+        next_bound = float('inf')
+        # Every entry of the stack is [node, key of its state, f, iterator
+        # over its successors or None if it has not been expanded yet]
+        stack = [[root, root_key, bound, None]]
+        path_keys = set([root_key])
+        while stack:
+            entry = stack[-1]
+            node, key, f, successors = entry
+            if successors is None:
+                if f > bound:
+                    next_bound = min(next_bound, f)
+                    stack.pop()
+                    path_keys.discard(key)
+                    continue
+                if problem.isGoalState(node.state):
+                    return stats.finish(node)
+                if stats.overBudget():
+                    return stats.finish(None)
+                # Every node within the previous bound was already expanded
+                # in the previous iteration
+                if f <= previous_bound:
+                    stats.reexpanded += 1
+                successors = entry[3] = iter(stats.getSuccessors(problem, node, onExpand))
+                if len(stack) > stats.maxFrontier:
+                    stats.maxFrontier = len(stack)
+
+            # Going down through the next successor that is not in the path
+            for child_state, action, step_cost in successors:
+                child_key = state_key(child_state)
+                if child_key in path_keys:
+                    continue
+                child = SearchNode(child_state, node, action, node.cost + step_cost)
+                path_keys.add(child_key)
+                stack.append([child, child_key,
+                              child.cost + heuristic(child_state, problem), None])
+                break
+            else:
+                stack.pop()
+                path_keys.discard(key)
+        previous_bound = bound
+        bound = next_bound
+
+    return stats.finish(None)
+
+
+class MemoryBoundedNode(SearchNode):
+    """
+    A node of the search tree kept by simplifiedMemoryBoundedAStarSearch.
+    Besides the SearchNode fields it stores its (backed up) f value, the
+    children that are in memory and the f values of the children that were
+    forgotten to free memory, both indexed by action.
+    """
+    __slots__ = ('key', 'f', 'children', 'forgotten', 'open', 'expanded', 'stamp')
+
+    def __init__(self, state, key, parent=None, action=None, cost=0):
+        SearchNode.__init__(self, state, parent, action, cost)
+        self.key = key
+        self.f = 0
+        self.children = {}
+        self.forgotten = {}
+        self.open = False
+        self.expanded = False
+        self.stamp = 0
+
+
+def simplifiedMemoryBoundedAStarSearch(problem, heuristic=nullHeuristic,
+                                       memoryLimit=100000, onExpand=None,
+                                       timeLimit=None, nodeLimit=None):
+    """Simplified memory-bounded A* (SMA*): A* that keeps at most
+    memoryLimit nodes in memory.  When memory is full the shallowest leaf
+    with the highest f is forgotten, and its f value is backed up into its
+    parent, which is put back in the open list so the forgotten subtree can
+    be regenerated if it becomes the most promising one.  The path found is
+    optimal if the heuristic is admissible and memoryLimit is larger than
+    the depth of the optimal solution."""
+    memoryLimit = int(memoryLimit)
+    stats = problem.searchStats = SearchStats(timeLimit, nodeLimit)
+    heuristic = stats.timeHeuristic(heuristic)
+    state_key = getStateKeyFunction(problem)
+    infinity = float('inf')
+
+    start_state = problem.getStartState()
+    root = MemoryBoundedNode(start_state, state_key(start_state))
+    root.f = heuristic(start_state, problem)
+    # The node with the cheapest path to every state in memory
+    best_nodes = {root.key: root}
+
+    # Best open node first (lowest f, deepest on ties) and worst leaf first
+    # (highest f, shallowest on ties).  Outdated entries are skipped thanks to
+    # the stamp of the node.
+    opened_heap, leaves_heap = [], []
+    counter = [0, 0, 1]     # Pushes, open nodes, nodes in memory
+
+    def openNode(node):
+        # The priority of a node whose children are partially in memory is
+        # the best f among its forgotten children
+        if node.children and node.forgotten:
+            priority = min(node.forgotten.values())
+        else:
+            priority = node.f
+        counter[0] += 1
+        if not node.open:
+            node.open = True
+            counter[1] += 1
+        node.stamp = counter[0]
+        heapq.heappush(opened_heap, (priority, -node.depth, counter[0], node))
+        heapq.heappush(leaves_heap, (-node.f, node.depth, counter[0], node))
+
+    def closeNode(node):
+        if node.open:
+            node.open = False
+            counter[1] -= 1
+
+    def backUp(node):
+        # Propagating to the ancestors the best f of their descendants
+        while node is not None and node.expanded:
+            values = [child.f for child in node.children.values()]
+            values.extend(node.forgotten.values())
+            best = min(values) if values else infinity
+            if best == node.f:
+                break
+            node.f = best
+            if node.open:
+                openNode(node)
+            node = node.parent
+
+    def forget(leaf):
+        # Removing a leaf from memory, its parent remembers its f
+        parent = leaf.parent
+        del parent.children[leaf.action]
+        parent.forgotten[leaf.action] = leaf.f
+        if best_nodes.get(leaf.key) is leaf:
+            del best_nodes[leaf.key]
+        closeNode(leaf)
+        counter[2] -= 1
+        backUp(parent)
+        openNode(parent)
+
+    openNode(root)
+    while opened_heap:
+        priority, _, stamp, node = heapq.heappop(opened_heap)
+        if not node.open or stamp != node.stamp:
+            continue
+        if priority == infinity:
+            break
+        if problem.isGoalState(node.state):
+            return stats.finish(node)
+        if stats.overBudget():
+            return stats.finish(None)
+        closeNode(node)
+        if node.expanded:
+            stats.reexpanded += 1
+        node.expanded = True
+
+        # Generating the children that are not in memory.  A child whose state
+        # is already in memory with a path that is not more expensive is
+        # dropped, which also discards the states of the path to the node
+        for child_state, action, step_cost in stats.getSuccessors(problem, node, onExpand):
+            if action in node.children:
+                continue
+            child_key = state_key(child_state)
+            best_node = best_nodes.get(child_key)
+            if best_node is not None and best_node.cost <= node.cost + step_cost:
+                node.forgotten.pop(action, None)
+                continue
+            child = MemoryBoundedNode(child_state, child_key, node, action,
+                                      node.cost + step_cost)
+            if child.depth >= memoryLimit - 1 and not problem.isGoalState(child_state):
+                # There is no memory to go deeper
+                child.f = infinity
+            else:
+                child.f = max(node.f, child.cost + heuristic(child_state, problem))
+            if action in node.forgotten:
+                child.f = max(child.f, node.forgotten.pop(action))
+            node.children[action] = child
+            best_nodes[child_key] = child
+            counter[2] += 1
+            openNode(child)
+
+        if not node.children and node.parent is not None:
+            # A dead end, it is forgotten right away
+            node.f = infinity
+            forget(node)
+        else:
+            backUp(node)
+
+        # Freeing memory
+        while counter[2] > memoryLimit and leaves_heap:
+            _, _, stamp, leaf = heapq.heappop(leaves_heap)
+            if (not leaf.open or stamp != leaf.stamp or leaf.children
+                    or leaf.parent is None):
+                continue
+            forget(leaf)
+
+        stats.maxFrontier = max(stats.maxFrontier, counter[1])
+        stats.maxClosed = max(stats.maxClosed, counter[2] - counter[1])
+
+    return stats.finish(None)
+
+
+def joinBidirectionalPath(forward_node, backward_node):
+    """
+    Returns the actions of the path formed by the path to forward_node from
+    the start and the path from backward_node, which has the same state, to
+    the goal.  The parent of a node of the backward search is the next state
+    towards the goal and its action leads to that state.
+    """
+    path = forward_node.getPath()
+    node = backward_node
+    while node.parent is not None:
+        path.append(node.action)
+        node = node.parent
+    return path
+
+
+def bidirectionalSearch(problem, onExpand=None, timeLimit=None, nodeLimit=None):
+    """Meet-in-the-middle breadth-first search from the start and from the
+    goal at the same time.
+
+    The problem must have a single explicit goal state, problem.goal, and a
+    getPredecessors(state) method returning triples (predecessor, action,
+    stepCost) where action leads from predecessor to state.  Both searches
+    grow by whole layers, the smaller frontier first, and the search stops in
+    the first layer that reaches a state visited by the other search, so the
+    path found has the fewest actions."""
+    stats = problem.searchStats = SearchStats(timeLimit, nodeLimit)
+    state_key = getStateKeyFunction(problem)
+    start_node = SearchNode(problem.getStartState())
+    goal_node = SearchNode(problem.goal)
+    if state_key(start_node.state) == state_key(goal_node.state):
+        return stats.finish(start_node)
+
+    # The visited states of every direction, indexed by key, and the layer
+    # of each direction that will be expanded next
+    forward = {state_key(start_node.state): start_node}
+    backward = {state_key(goal_node.state): goal_node}
+    forward_layer, backward_layer = [start_node], [goal_node]
+
+    while forward_layer and backward_layer:
+        is_backward = len(backward_layer) < len(forward_layer)
+        if is_backward:
+            layer, visited, other = backward_layer, backward, forward
+        else:
+            layer, visited, other = forward_layer, forward, backward
+
+        next_layer = []
+        meeting = None
+        for node in layer:
+            if stats.overBudget():
+                return stats.finish(None)
+            for child_state, action, step_cost in stats.getSuccessors(
+                    problem, node, onExpand, is_backward):
+                child_key = state_key(child_state)
+                if child_key in visited:
+                    continue
+                child = SearchNode(child_state, node, action, node.cost + step_cost)
+                visited[child_key] = child
+                next_layer.append(child)
+                # Keeping the shortest of the paths that meet in this layer
+                if child_key in other:
+                    length = child.depth + other[child_key].depth
+                    if meeting is None or length < meeting[0]:
+                        meeting = (length, child, other[child_key])
+        stats.maxClosed = len(forward) + len(backward)
+        stats.maxFrontier = max(stats.maxFrontier, len(next_layer))
+
+        if meeting is not None:
+            _, node, other_node = meeting
+            if is_backward:
+                node, other_node = other_node, node
+            stats.finish(None)
+            stats.pathCost = node.cost + other_node.cost
+            return joinBidirectionalPath(node, other_node)
+        if is_backward:
+            backward_layer = next_layer
+        else:
+            forward_layer = next_layer
+
+    return stats.finish(None)
+
+
+class ReversedProblem:
+    """
+    The view of a problem used by the backward half of a bidirectional
+    search: its goal is the start state of the problem and every other
+    attribute is the one of the problem, so heuristics written in terms of
+    problem.goal estimate the distance back to the start.
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.goal = problem.getStartState()
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+
+def bidirectionalAStarSearch(problem, heuristic=nullHeuristic, onExpand=None,
+                             timeLimit=None, nodeLimit=None):
+    """Bidirectional A*: an A* search from the start towards problem.goal
+    and another from the goal back to the start (see bidirectionalSearch for
+    the requirements on the problem), expanding the smaller open list first.
+
+    The backward search evaluates the heuristic on ReversedProblem(problem).
+    With a consistent heuristic the search stops as soon as the lowest f of
+    either open list reaches the cost of the best path through a state that
+    both searches have reached, and that path is optimal."""
+    stats = problem.searchStats = SearchStats(timeLimit, nodeLimit)
+    heuristic = stats.timeHeuristic(heuristic)
+    state_key = getStateKeyFunction(problem)
+    reversed_problem = ReversedProblem(problem)
+    infinity = float('inf')
+
+    # Every direction has an open list of state keys, the best node found
+    # for every key and a closed set; searches[1] is the backward one
+    searches = []
+    for root_state, view in ((problem.getStartState(), problem),
+                             (problem.goal, reversed_problem)):
+        root = SearchNode(root_state)
+        opened_list = util.IndexedPriorityQueue()
+        opened_list.push(state_key(root_state), heuristic(root_state, view))
+        searches.append((opened_list, {state_key(root_state): root}, set(), view))
+
+    best_cost, meeting = infinity, None
+    if state_key(problem.getStartState()) == state_key(problem.goal):
+        best_cost, meeting = 0, (searches[0][1][state_key(problem.goal)],
+                                 searches[1][1][state_key(problem.goal)])
+
+    while not searches[0][0].isEmpty() and not searches[1][0].isEmpty():
+        if max(searches[0][0].getPriority(searches[0][0].peek()),
+               searches[1][0].getPriority(searches[1][0].peek())) >= best_cost:
+            break
+        if stats.overBudget():
+            return stats.finish(None)
+        is_backward = len(searches[1][0]) < len(searches[0][0])
+        opened_list, nodes, closed_set, view = searches[is_backward]
+        other_nodes = searches[not is_backward][1]
+
+        current_key = opened_list.pop()
+        current_node = nodes[current_key]
+        closed_set.add(current_key)
+        cost = current_node.cost
+        for child_state, action, step_cost in stats.getSuccessors(
+                problem, current_node, onExpand, is_backward):
+            child_key = state_key(child_state)
+            if child_key in closed_set:
+                continue
+            previous_node = nodes.get(child_key)
+            if previous_node is None or cost + step_cost < previous_node.cost:
+                child_node = SearchNode(child_state, current_node, action, cost + step_cost)
+                nodes[child_key] = child_node
+                opened_list.update(child_key, child_node.cost + heuristic(child_state, view))
+                # Both searches met, this may be the best path so far
+                if child_key in other_nodes:
+                    other_node = other_nodes[child_key]
+                    if child_node.cost + other_node.cost < best_cost:
+                        best_cost = child_node.cost + other_node.cost
+                        if is_backward:
+                            meeting = (other_node, child_node)
+                        else:
+                            meeting = (child_node, other_node)
+        stats.maxClosed = len(searches[0][2]) + len(searches[1][2])
+        stats.maxFrontier = max(stats.maxFrontier, len(searches[0][0]) + len(searches[1][0]))
+
+    if meeting is None:
+        return stats.finish(None)
+    stats.finish(None)
+    stats.pathCost = best_cost
+    return joinBidirectionalPath(*meeting)
+
+
+class JumpPointProblem:
+    """
+    The search space of Jump Point Search over a PositionSearchProblem whose
+    steps all cost stepCost.  A state is a (position, direction) pair, the
+    direction being the vector of the last move (None at the start), and the
+    successors of a state are the jump points reached by going straight in
+    each direction that is not pruned.  Each action is a (direction, length)
+    segment of the path.
+
+    Paths are made canonical by moving vertically as soon as possible: a
+    vertical move may turn horizontally anywhere, but a horizontal move only
+    turns where a wall behind makes the vertical move forced.
+    """
+
+    def __init__(self, problem, stepCost):
+        self.problem = problem
+        self.walls = problem.walls
+        self.goal = problem.goal
+        self.stepCost = stepCost
+
+    def getStartState(self):
+        return (self.problem.getStartState(), None)
+
+    def isGoalState(self, state):
+        return self.problem.isGoalState(state[0])
+
+    def getSuccessors(self, state):
+        position, direction = state
+        successors = []
+        for new_direction in self.getDirections(position, direction):
+            jump_point = self.jump(position, new_direction)
+            if jump_point is not None:
+                length = abs(jump_point[0] - position[0]) + abs(jump_point[1] - position[1])
+                successors.append(((jump_point, new_direction), (new_direction, length),
+                                   length * self.stepCost))
+
+        # Bookkeeping for display purposes
+        self.problem._expanded += 1
+        if position not in self.problem._visited:
+            self.problem._visited[position] = True
+            self.problem._visitedlist.append(position)
+        return successors
+
+    def getDirections(self, position, direction):
+        "Returns the directions that are not pruned after arriving at position"
+        if direction is None:
+            return [(0, 1), (0, -1), (1, 0), (-1, 0)]
+        dx, dy = direction
+        if dx == 0:
+            return [direction, (1, 0), (-1, 0)]
+        x, y = position
+        return [direction] + [(0, sy) for sy in (1, -1)
+                              if not self.walls[x][y + sy] and self.walls[x - dx][y + sy]]
+
+    def jump(self, position, direction):
+        """
+        Returns the first jump point found going straight from position in
+        direction, or None if a wall is found first.
+        """
+        x, y = position
+        dx, dy = direction
+        while True:
+            x, y = x + dx, y + dy
+            if self.walls[x][y]:
+                return None
+            if (x, y) == self.goal:
+                return (x, y)
+            if dx != 0:
+                # Horizontal moves stop where a vertical move is forced
+                for sy in (1, -1):
+                    if not self.walls[x][y + sy] and self.walls[x - dx][y + sy]:
+                        return (x, y)
+            else:
+                # Vertical moves stop where a horizontal jump finds something
+                if self.jump((x, y), (1, 0)) is not None or self.jump((x, y), (-1, 0)) is not None:
+                    return (x, y)
+
+
+def jumpPointSearch(problem, heuristic=nullHeuristic, onExpand=None, timeLimit=None, nodeLimit=None):
+    """Jump Point Search: A* over the jump points of a uniform-cost
+    PositionSearchProblem, skipping the many symmetric paths of an open grid.
+    The path has the same cost as the one of aStarSearch.  Other problems
+    (see PositionSearchProblem.getUniformStepCost) fall back to aStarSearch.
+    The heuristic is evaluated on positions, e.g. manhattanHeuristic."""
+    step_cost = None
+    if 'getUniformStepCost' in dir(problem):
+        step_cost = problem.getUniformStepCost()
+    if step_cost is None:
+        return aStarSearch(problem, heuristic, onExpand=onExpand,
+                           timeLimit=timeLimit, nodeLimit=nodeLimit)
+
+    jump_problem = JumpPointProblem(problem, step_cost)
+    stats = SearchStats(timeLimit, nodeLimit)
+    heuristic = stats.timeHeuristic(heuristic)
+    def priority_function(node):
+        return node.cost + heuristic(node.state[0], problem)
+    segments = solveBestFirstSearch(jump_problem, priority_function, onExpand=onExpand, stats=stats)
+    problem.searchStats = stats
+    if segments is None:
+        return None
+
+    # Every segment becomes as many unit actions as its length
+    path = []
+    for direction, length in segments:
+        path += [Actions.vectorToDirection(direction)] * length
+    return path
 
 
 # Abbreviations
@@ -177,3 +1085,12 @@ bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+idastar = iterativeDeepeningAStarSearch
+smastar = simplifiedMemoryBoundedAStarSearch
+bibfs = bidirectionalSearch
+biastar = bidirectionalAStarSearch
+wastar = weightedAStarSearch
+gbfs = greedyBestFirstSearch
+beam = beamSearch
+jps = jumpPointSearch
+awastar = anytimeWeightedAStarSearch
@@ -38,6 +38,7 @@ Good luck and happy searching!
 from game import Directions
 from game import Agent
 from game import Actions
+from game import Grid
 import util
 import time
 import search
@@ -59,6 +60,16 @@ class GoWestAgent(Agent):
 #######################################################
 
 
+def parseSearchArg(value):
+    "Converts a search argument given in the command line to a number if possible"
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except (TypeError, ValueError):
+            pass
+    return value
+
+
 class SearchAgent(Agent):
     """
     This very general search agent finds a path using a supplied search
@@ -71,12 +82,31 @@ class SearchAgent(Agent):
     Options for fn include:
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
-
+      iterativeDeepeningAStarSearch or idastar
+      simplifiedMemoryBoundedAStarSearch or smastar (memoryLimit=<nodes>)
+      bidirectionalSearch or bibfs
+      bidirectionalAStarSearch or biastar
+      weightedAStarSearch or wastar (w=<weight>)
+      greedyBestFirstSearch or gbfs
+      beamSearch or beam (width=<nodes>)
+      jumpPointSearch or jps
+      anytimeWeightedAStarSearch or awastar (w=<weight>,decrement=<step>)
+
+    Every search function also takes a budget, timeLimit=<seconds> and/or
+    nodeLimit=<nodes expanded>, after which it gives up; the anytime search
+    then returns the best path found so far.  When the budget runs out before a
+    path to the goal is found, the agent follows the partial path (if any)
+    and searches again from where it ends, doubling the budget whenever a
+    search gets no closer to the goal.
+
+    Any other argument is passed to the search function, for example
+
+    > python pacman.py -p SearchAgent -a fn=astar,heuristic=manhattanHeuristic,cacheSize=1000
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', **searchArgs):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
@@ -84,9 +114,15 @@ class SearchAgent(Agent):
             raise AttributeError(
                 fn + ' is not a search function in search.py.')
         func = getattr(search, fn)
+        searchArgs = dict((key, parseSearchArg(value))
+                          for key, value in searchArgs.items())
+        self.searchArgs = searchArgs
         if 'heuristic' not in func.__code__.co_varnames:
             print('[SearchAgent] using function ' + fn)
-            self.searchFunction = func
+            if searchArgs:
+                self.searchFunction = lambda x: func(x, **searchArgs)
+            else:
+                self.searchFunction = func
         else:
             if heuristic in globals().keys():
                 heur = globals()[heuristic]
@@ -98,7 +134,7 @@ class SearchAgent(Agent):
             print('[SearchAgent] using function %s and heuristic %s' %
                   (fn, heuristic))
             # Note: this bit of Python trickery combines the search algorithm and the heuristic
-            self.searchFunction = lambda x: func(x, heuristic=heur)
+            self.searchFunction = lambda x: func(x, heuristic=heur, **searchArgs)
 
         # Get the search problem type from the name
         if prob not in globals().keys() or not prob.endswith('Problem'):
@@ -118,20 +154,53 @@ class SearchAgent(Agent):
         """
         if self.searchFunction == None:
             raise Exception("No search function provided for SearchAgent")
+        self.actions = self.findPath(state)
+
+    def findPath(self, state):
+        """
+        Searches a path from state and prints its statistics.  Sets
+        self.partialPlan when the search budget ran out before the goal was
+        reached, the path returned (possibly empty) then only gets closer to
+        the goal.
+        """
         starttime = time.time()
         problem = self.searchType(state)  # Makes a new search problem
-        self.actions = self.searchFunction(problem)  # Find a path
-        totalCost = problem.getCostOfActions(self.actions)
-        print('Path found with total cost of %d in %.1f seconds' %
-              (totalCost, time.time() - starttime))
+        actions = self.searchFunction(problem)  # Find a path
+        stats = getattr(problem, 'searchStats', None)
+        self.partialPlan = stats is not None and stats.exhausted and stats.pathCost is None
+        if actions == None:
+            actions = []
+            if not self.partialPlan:
+                print('No path found, staying still')
+        totalCost = problem.getCostOfActions(actions)
+        if self.partialPlan:
+            print('Search budget exhausted, partial path of total cost %d found in %.1f seconds' %
+                  (totalCost, time.time() - starttime))
+        else:
+            print('Path found with total cost of %d in %.1f seconds' %
+                  (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem):
             print('Search nodes expanded: %d' % problem._expanded)
+        if 'searchStats' in dir(problem):
+            print(problem.searchStats)
+        if 'heuristicInfo' in dir(problem) and 'heuristicCache' in problem.heuristicInfo:
+            cache = problem.heuristicInfo['heuristicCache']
+            print('Heuristic cache: %d states, hit rate %.2f' %
+                  (len(cache), cache.hitRate()))
+        return actions
+
+    def growBudget(self):
+        "Doubles the time and node budgets of the search function"
+        for key in ('timeLimit', 'nodeLimit'):
+            if self.searchArgs.get(key):
+                self.searchArgs[key] *= 2
 
     def getAction(self, state):
         """
         Returns the next action in the path chosen earlier (in
         registerInitialState).  Return Directions.STOP if there is no further
-        action to take.
+        action to take.  A partial path is followed by a new search from its
+        end.
 
         state: a GameState object (pacman.py)
         """
@@ -141,8 +210,14 @@ class SearchAgent(Agent):
         self.actionIndex += 1
         if i < len(self.actions):
             return self.actions[i]
-        else:
-            return Directions.STOP
+        if 'partialPlan' in dir(self) and self.partialPlan:
+            self.actions = self.findPath(state)
+            self.actionIndex = 1
+            if self.actions:
+                return self.actions[0]
+            # The search got no closer to the goal, give the next one more room
+            self.growBudget()
+        return Directions.STOP
 
 
 class PositionSearchProblem(search.SearchProblem):
@@ -165,6 +240,7 @@ class PositionSearchProblem(search.SearchProblem):
         goal: A position in the gameState
         """
         self.walls = gameState.getWalls()
+        self.neighborTable = gameState.data.layout.getNeighborTable()
         self.startState = gameState.getPacmanPosition()
         if start != None:
             self.startState = start
@@ -208,14 +284,11 @@ class PositionSearchProblem(search.SearchProblem):
         """
 
         successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x, y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-                successors.append((nextState, action, cost))
+        positions = self.neighborTable.positions
+        for neighbor, action in self.neighborTable.getNeighbors(state):
+            nextState = positions[neighbor]
+            cost = self.costFn(nextState)
+            successors.append((nextState, action, cost))
 
         # Bookkeeping for display purposes
         self._expanded += 1  # DO NOT CHANGE
@@ -225,6 +298,46 @@ class PositionSearchProblem(search.SearchProblem):
 
         return successors
 
+    def getPredecessors(self, state):
+        """
+        Returns the states from which state can be reached, used by the
+        bidirectional searches of search.py.
+
+        Moves are reversible, so this returns a list of triples
+        (predecessor, action, stepCost) where 'predecessor' is a neighbour of
+        state, 'action' is the action that leads from the predecessor to state
+        and 'stepCost' is the cost of entering state.
+        """
+        predecessors = []
+        cost = self.costFn(state)
+        positions = self.neighborTable.positions
+        for neighbor, action in self.neighborTable.getNeighbors(state):
+            predecessors.append((positions[neighbor], Directions.REVERSE[action], cost))
+
+        # Bookkeeping for display purposes
+        self._expanded += 1  # DO NOT CHANGE
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return predecessors
+
+    def getUniformStepCost(self):
+        """
+        Returns the cost of every step if costFn is the same on every free
+        cell and the goal is a single position, None otherwise.  Used by
+        jumpPointSearch, which only works on uniform-cost grids.
+        """
+        cls = type(self)
+        if cls.isGoalState is not PositionSearchProblem.isGoalState or \
+                cls.getSuccessors is not PositionSearchProblem.getSuccessors:
+            return None
+        costs = set(self.costFn(position) for position in self.neighborTable.positions
+                    if not self.walls[position[0]][position[1]])
+        if len(costs) != 1:
+            return None
+        return costs.pop()
+
     def getCostOfActions(self, actions):
         """
         Returns the cost of a particular sequence of actions. If those actions
@@ -294,7 +407,10 @@ class CornersProblem(search.SearchProblem):
     """
     This search problem finds paths through all four corners of a layout.
 
-    You must select a suitable state space and successor function
+    A search state is a tuple ( x, y, cornerMask ) where (x, y) is Pacman's
+    position and the i-th bit of cornerMask is set if the i-th corner of
+    self.corners has not been visited yet.  States are immutable and can be
+    used directly as dictionary keys.
     """
 
     def __init__(self, startingGameState):
@@ -302,18 +418,24 @@ class CornersProblem(search.SearchProblem):
         Stores the walls, pacman's starting position and corners.
         """
         self.walls = startingGameState.getWalls()
+        self.neighborTable = startingGameState.data.layout.getNeighborTable()
         self.startingPosition = startingGameState.getPacmanPosition()
         top, right = self.walls.height-2, self.walls.width-2
         self.corners = ((1, 1), (1, top), (right, 1), (right, top))
-        starting_position_corners = list(self.corners)
+        self.cornerBits = dict((corner, 1 << i) for i, corner in enumerate(self.corners))
+        starting_corner_mask = 0
         for corner in self.corners:
             if not startingGameState.hasFood(*corner):
                 print('Warning: no food in corner ' + str(corner))
-                starting_position_corners.remove(corner)
+            else:
+                starting_corner_mask |= self.cornerBits[corner]
+        self.startingGameState = startingGameState
         self._expanded = 0  # DO NOT CHANGE; Number of search nodes expanded
+        self.heuristicInfo = {}  # A dictionary for the heuristic to store information
 
-        # We define a starting state which includes the starting positions
-        self.starting_state = (self.startingPosition, starting_position_corners)
+        # We define a starting state which includes the starting position
+        # and the corners that have to be visited
+        self.starting_state = self.startingPosition + (starting_corner_mask,)
 
     def getStartState(self):
         """
@@ -327,9 +449,8 @@ class CornersProblem(search.SearchProblem):
         """
         Returns whether this search state is a goal state of the problem.
         """
-        # Checking the lenght of the corners in the state
-        # If list containing the corners is empty, return true
-        return len(state[1]) == 0
+        # If there are no corners left to visit, this is a goal
+        return state[2] == 0
 
 
     def getSuccessors(self, state):
@@ -344,30 +465,20 @@ class CornersProblem(search.SearchProblem):
         """
         successors = []
 
-        # Getting the position in the state
-        (x, y) = state[0]
-
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                # Building the structure of the child state
-                child_state = ((nextx, nexty), state[1].copy())
-
-                # If the postion is in a corner, we remove that 
-                # position from the not visited corners
-                if child_state[0] in child_state[1]:
-                    child_state[1].remove(child_state[0])
+        # Getting the position and the corners left in the state
+        x, y, corner_mask = state
+        positions = self.neighborTable.positions
 
-                # Building the structure of the child node
-                child_node = (child_state, action, 1)
+        for neighbor, action in self.neighborTable.getNeighbors((x, y)):
+            nextx, nexty = positions[neighbor]
+            # If the postion is in a corner, we clear the bit
+            # of that corner in the mask
+            child_mask = corner_mask & ~self.cornerBits.get((nextx, nexty), 0)
+            successors.append(((nextx, nexty, child_mask), action, 1))
 
-                successors.append(child_node)
-                
         self._expanded += 1  # DO NOT CHANGE
         return successors
 
-
     def getCostOfActions(self, actions):
         """
         Returns the cost of a particular sequence of actions.  If those actions
@@ -406,67 +517,45 @@ def cornersHeuristic(state, problem):
     shortest path from the state to a goal of the problem; i.e.  it should be
     admissible (as well as consistent).
     """
-    corners = problem.corners  # These are the corner coordinates
-    # These are the walls of the maze, as a Grid (game.py)
-    walls = problem.walls
-
-    if len(state[1]) == 0:
-        return 0
-    value = (walls_between(state, walls.asList()))**len(state[1])
-    return value
-
-
-def closest_corner(state):
-    position = state[0]
-    distance = 0
-    minimum_distance = 99999
-    closest_corner = None
-    for corner in state[1]:
-        distance = abs(position[0] - corner[0]) + abs(position[1] - corner[1])
-        if minimum_distance > distance:
-            minimum_distance = distance
-            closest_corner = corner
-    return closest_corner
-
-
-def closest_corner_distance(state):
-    position = state[0]
-    distance = 0
-    minimum_distance = 99999
-    for corner in state[1]:
-        distance = abs(position[0] - corner[0]) + abs(position[1] - corner[1])
-        if minimum_distance > distance:
-            minimum_distance = distance
-    return minimum_distance
-
-
-def walls_between(state, walls):
-    x, y = state[0]
-    corner = closest_corner(state)
-    if corner is None:
+    x, y, corner_mask = state
+    if corner_mask == 0:
         return 0
-    else:
-        cor_x, cor_y = corner
-    num_walls = 1
-
-    # Moving in X and counting the walls between
-    while x != cor_x:
-        if x < cor_x:
-            x += 1
-        else: 
-            x -= 1
-        if (x,y) in walls:
-            num_walls += 1
-    
-    # Moving in Y and counting the walls between
-    while y != cor_y:
-        if y < cor_y:
-            y += 1
-        else: 
-            y -= 1
-        if (x,y) in walls:
-            num_walls += 1
-    return num_walls
+    info = problem.heuristicInfo
+    if 'cornerTours' not in info:
+        # Corner-to-corner tours are computed once per problem
+        info['mazeDistances'] = problem.startingGameState.data.layout.getMazeDistances()
+        info['cornerTours'] = corner_tours(problem.corners, problem.getStartState()[2],
+                                           info['mazeDistances'])
+    distances, tours = info['mazeDistances'], info['cornerTours']
+
+    # Pacman has to walk to one of the remaining corners and then visit the
+    # others in the best order
+    best = None
+    for i, corner in enumerate(problem.corners):
+        bit = 1 << i
+        if corner_mask & bit:
+            value = distances.getDistance((x, y), corner) + tours[i][corner_mask & ~bit]
+            if best is None or value < best:
+                best = value
+    return best
+
+
+def corner_tours(corners, corner_mask, distances):
+    """
+    Returns a table where tours[i][mask] is the length of the shortest walk
+    that starts at corners[i] and visits every corner of mask.  Only the
+    corners of corner_mask are used, as the others may be walls.
+    """
+    tours = [[0] * (1 << len(corners)) for _ in corners]
+    # Masks are visited in increasing order, so every smaller mask is ready
+    for mask in range(1, 1 << len(corners)):
+        if mask & ~corner_mask:
+            continue
+        for i, corner in enumerate(corners):
+            if corner_mask >> i & 1 and not mask >> i & 1:
+                tours[i][mask] = min(distances.getDistance(corner, corners[j]) + tours[j][mask & ~(1 << j)]
+                                     for j in range(len(corners)) if mask >> j & 1)
+    return tours
 
 
 class AStarCornersAgent(SearchAgent):
@@ -492,6 +581,7 @@ class FoodSearchProblem:
         self.start = (startingGameState.getPacmanPosition(),
                       startingGameState.getFood())
         self.walls = startingGameState.getWalls()
+        self.neighborTable = startingGameState.data.layout.getNeighborTable()
         self.startingGameState = startingGameState
         self._expanded = 0  # DO NOT CHANGE
         self.heuristicInfo = {}  # A dictionary for the heuristic to store information
@@ -506,14 +596,12 @@ class FoodSearchProblem:
         "Returns successor states, the actions they require, and a cost of 1."
         successors = []
         self._expanded += 1  # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x, y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append((((nextx, nexty), nextFood), direction, 1))
+        positions = self.neighborTable.positions
+        for neighbor, direction in self.neighborTable.getNeighbors(state[0]):
+            nextx, nexty = positions[neighbor]
+            nextFood = state[1].copy()
+            nextFood[nextx][nexty] = False
+            successors.append((((nextx, nexty), nextFood), direction, 1))
         return successors
 
     def getCostOfActions(self, actions):
@@ -531,13 +619,59 @@ class FoodSearchProblem:
         return cost
 
 
+class BitmaskFoodSearchProblem(FoodSearchProblem):
+    """
+    The FoodSearchProblem with a compact state representation.
+
+    A search state is a tuple ( pacmanPosition, foodMask ) where foodMask is
+    an integer whose i-th bit is set if the i-th dot of self.foodPositions has
+    not been eaten yet.  States are immutable and hash in constant time, and
+    eating a dot only clears a bit instead of copying the whole food Grid.
+    getFoodGrid converts a mask back into a Grid, e.g. for display.
+    """
+
+    def __init__(self, startingGameState):
+        FoodSearchProblem.__init__(self, startingGameState)
+        self.foodPositions = startingGameState.getFood().asList()
+        self.foodBits = dict((position, 1 << i)
+                             for i, position in enumerate(self.foodPositions))
+        self.start = (self.start[0], (1 << len(self.foodPositions)) - 1)
+
+    def isGoalState(self, state):
+        return state[1] == 0
+
+    def getSuccessors(self, state):
+        "Returns successor states, the actions they require, and a cost of 1."
+        successors = []
+        self._expanded += 1  # DO NOT CHANGE
+        position, foodMask = state
+        positions = self.neighborTable.positions
+        for neighbor, direction in self.neighborTable.getNeighbors(position):
+            nextPosition = positions[neighbor]
+            nextFood = foodMask & ~self.foodBits.get(nextPosition, 0)
+            successors.append(((nextPosition, nextFood), direction, 1))
+        return successors
+
+    def getFoodList(self, foodMask):
+        "Returns the positions of the dots whose bits are set in foodMask"
+        return [position for i, position in enumerate(self.foodPositions)
+                if foodMask >> i & 1]
+
+    def getFoodGrid(self, foodMask):
+        "Returns a Grid with the dots whose bits are set in foodMask"
+        grid = Grid(self.walls.width, self.walls.height)
+        for x, y in self.getFoodList(foodMask):
+            grid[x][y] = True
+        return grid
+
+
 class AStarFoodSearchAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
 
     def __init__(self):
         self.searchFunction = lambda prob: search.aStarSearch(
             prob, foodHeuristic)
-        self.searchType = FoodSearchProblem
+        self.searchType = BitmaskFoodSearchProblem
 
 
 def foodHeuristic(state, problem):
@@ -555,7 +689,9 @@ def foodHeuristic(state, problem):
 
     The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a Grid
     (see game.py) of either True or False. You can call foodGrid.asList() to get
-    a list of food coordinates instead.
+    a list of food coordinates instead.  AStarFoodSearchAgent searches a
+    BitmaskFoodSearchProblem, whose states are ( pacmanPosition, foodMask )
+    instead: problem.getFoodList(foodMask) gives the list of food coordinates.
 
     If you want access to info like walls, capsules, etc., you can query the
     problem.  For example, problem.walls gives you a Grid of where the walls
@@ -568,31 +704,116 @@ def foodHeuristic(state, problem):
     Subsequent calls to this heuristic can access
     problem.heuristicInfo['wallCount']
     """
-    position, foodGrid = state
-    "*** YOUR CODE HERE ***"
-    return 0
+    position, food = state
+    info = problem.heuristicInfo
+    if 'mazeDistances' not in info:
+        # Maze distances are shared by every call, and the cost of the
+        # spanning tree of each set of remaining food is cached
+        info['mazeDistances'] = problem.startingGameState.data.layout.getMazeDistances()
+        info['spanningTreeCache'] = {}
+
+    # Mask states come from a BitmaskFoodSearchProblem, which knows its dots
+    if isinstance(food, int):
+        foodList = problem.getFoodList(food)
+    else:
+        foodList = food.asList()
+    if not foodList:
+        return 0
+
+    # Pacman has to reach some dot, and then connect all of them.  The mask
+    # or the (hashable) food Grid itself is the key of the cache
+    distances = info['mazeDistances']
+    nearest = min(distances.getDistance(position, p) for p in foodList)
+    cache = info['spanningTreeCache']
+    if food not in cache:
+        cache[food] = spanning_tree_cost(foodList, distances)
+    return nearest + cache[food]
+
+
+def spanning_tree_cost(points, distances):
+    """
+    Returns the cost of the minimum spanning tree of points, using the maze
+    distances between them (Prim's algorithm).
+    """
+    best = dict((p, distances.getDistance(points[0], p)) for p in points[1:])
+    cost = 0
+    while best:
+        closest = min(best, key=best.get)
+        cost += best.pop(closest)
+        for p in best:
+            distance = distances.getDistance(closest, p)
+            if distance < best[p]:
+                best[p] = distance
+    return cost
 
 
 class ClosestDotSearchAgent(SearchAgent):
     "Search for all food using a sequence of searches"
 
     def registerInitialState(self, state):
+        """
+        Plans the whole game up front.  Instead of building a GameState after
+        every move, each segment is a breadth-first search over the layout's
+        neighbor table, and the remaining food is a bytearray indexed by cell
+        id that is updated in place.  The complete plan is checked against the
+        walls and food of state at the end.
+        """
         self.actions = []
-        currentState = state
-        while(currentState.getFood().count() > 0):
-            nextPathSegment = self.findPathToClosestDot(
-                currentState)  # The missing piece
+        neighborTable = state.data.layout.getNeighborTable()
+        food = bytearray(len(neighborTable.positions))
+        for position in state.getFood().asList():
+            food[neighborTable.cellId(position)] = 1
+        remaining = state.getNumFood()
+        current = neighborTable.cellId(state.getPacmanPosition())
+        while remaining > 0:
+            nextPathSegment, current = self.findPathToClosestCell(neighborTable, current, food)
+            if nextPathSegment is None:
+                raise Exception('No reachable food left:\n%s' % str(state))
             self.actions += nextPathSegment
-            for action in nextPathSegment:
-                legal = currentState.getLegalActions()
-                if action not in legal:
-                    t = (str(action), str(currentState))
-                    raise Exception(
-                        'findPathToClosestDot returned an illegal move: %s!\n%s' % t)
-                currentState = currentState.generateSuccessor(0, action)
+            food[current] = 0
+            remaining -= 1
+        self.checkPlan(state, self.actions)
         self.actionIndex = 0
         print('Path found with cost %d.' % len(self.actions))
 
+    def findPathToClosestCell(self, neighborTable, start, food):
+        """
+        Returns the actions from cell start to the closest cell whose entry
+        of food is set, and that cell, or (None, start) if there is none.
+        """
+        parents = {start: None}
+        frontier = util.Queue()
+        frontier.push(start)
+        while not frontier.isEmpty():
+            cell = frontier.pop()
+            if food[cell]:
+                goal, actions = cell, []
+                while parents[cell] is not None:
+                    cell, action = parents[cell]
+                    actions.append(action)
+                actions.reverse()
+                return actions, goal
+            for neighbor, action in neighborTable.neighbors[cell]:
+                if neighbor not in parents:
+                    parents[neighbor] = (cell, action)
+                    frontier.push(neighbor)
+        return None, start
+
+    def checkPlan(self, state, actions):
+        "Checks that actions are legal from state and eat all of its food"
+        walls, food = state.getWalls(), state.getFood().copy()
+        x, y = state.getPacmanPosition()
+        for action in actions:
+            dx, dy = Actions.directionToVector(action)
+            nextx, nexty = int(x + dx), int(y + dy)
+            if walls[nextx][nexty]:
+                t = (str(action), (x, y))
+                raise Exception('The plan contains an illegal move: %s from %s!' % t)
+            x, y = nextx, nexty
+            food[x][y] = False
+        if food.count() > 0:
+            raise Exception('The plan does not eat all the food:\n%s' % str(food))
+
     def findPathToClosestDot(self, gameState):
         """
         Returns a path (a list of actions) to the closest dot, starting from
@@ -604,8 +825,7 @@ class ClosestDotSearchAgent(SearchAgent):
         walls = gameState.getWalls()
         problem = AnyFoodSearchProblem(gameState)
 
-        "*** YOUR CODE HERE ***"
-        util.raiseNotDefined()
+        return search.breadthFirstSearch(problem)
 
 
 class AnyFoodSearchProblem(PositionSearchProblem):
@@ -630,6 +850,7 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 
         # Store info for the PositionSearchProblem (no need to change this)
         self.walls = gameState.getWalls()
+        self.neighborTable = gameState.data.layout.getNeighborTable()
         self.startState = gameState.getPacmanPosition()
         self.costFn = lambda x: 1
         self._visited, self._visitedlist, self._expanded = {}, [], 0  # DO NOT CHANGE
@@ -641,15 +862,17 @@ class AnyFoodSearchProblem(PositionSearchProblem):
         """
         x, y = state
 
-        "*** YOUR CODE HERE ***"
-        util.raiseNotDefined()
+        return self.food[x][y]
 
 
 def mazeDistance(point1, point2, gameState):
     """
-    Returns the maze distance between any two points, using the search functions
-    you have already built. The gameState can be any game state -- Pacman's
-    position in that state is ignored.
+    Returns the maze distance between any two points. The gameState can be any
+    game state -- Pacman's position in that state is ignored.
+
+    The distances between all the cells of the layout are computed the first
+    time and cached (see layout.MazeDistances), so every other call is a
+    constant time lookup.
 
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
@@ -660,6 +883,4 @@ def mazeDistance(point1, point2, gameState):
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(
-        gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    return gameState.data.layout.getMazeDistances().getDistance(point1, point2)
@@ -0,0 +1,209 @@
+# searchBenchmark.py
+# ------------------
+"""
+Headless benchmark of the algorithms of search.py.
+
+Runs every cell of the matrix layout x problem type x search function x
+heuristic without graphics, each one in a fresh process of a pool, and writes
+a CSV or JSON table with the path cost, nodes expanded, peak frontier, wall
+time and peak RSS of every cell.
+
+EXAMPLES:   (1) python searchBenchmark.py -l 'layouts/*Maze.lay' -f bfs,ucs,astar
+                -H nullHeuristic,manhattanHeuristic
+            (2) python searchBenchmark.py -l tinyCorners,mediumCorners -p CornersProblem
+                -f astar -H cornersHeuristic --format json -o corners.json
+"""
+
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import signal
+import sys
+import time
+from optparse import OptionParser
+
+import layout
+import pacman
+import search
+import searchAgents
+
+FIELDS = ['layout', 'problem', 'function', 'heuristic', 'status', 'cost',
+          'expanded', 'maxFrontier', 'time', 'maxRSS']
+
+
+class BenchmarkTimeout(Exception):
+    pass
+
+
+def raiseTimeout(signum, frame):
+    raise BenchmarkTimeout()
+
+
+def takesHeuristic(function):
+    return 'heuristic' in getattr(search, function).__code__.co_varnames
+
+
+def getLayoutNames(patterns):
+    """
+    Turns a comma separated list of layout names, files or glob patterns into
+    layout names, e.g. 'layouts/*Search.lay,tinyMaze'.
+    """
+    names = []
+    for pattern in patterns.split(','):
+        files = glob.glob(pattern)
+        if files:
+            names += sorted(os.path.splitext(os.path.basename(f))[0] for f in files)
+        else:
+            names.append(pattern)
+    return names
+
+
+def getCells(options):
+    "Returns the (layout, problem, function, heuristic) cells of the matrix"
+    cells = []
+    for layoutName in getLayoutNames(options.layouts):
+        for problem in options.problems.split(','):
+            for function in options.functions.split(','):
+                if takesHeuristic(function):
+                    heuristics = options.heuristics.split(',')
+                else:
+                    heuristics = ['']
+                for heuristic in heuristics:
+                    cells.append((layoutName, problem, function, heuristic, options.timeout))
+    return cells
+
+
+def runCell(cell):
+    """
+    Runs one search and returns its row of the table.  Runs in its own process,
+    so the peak RSS is the one of this search.
+    """
+    layoutName, problemName, function, heuristic, timeout = cell
+    row = dict(layout=layoutName, problem=problemName, function=function,
+               heuristic=heuristic, status='ok', cost='', expanded='',
+               maxFrontier='', time='', maxRSS='')
+    starttime = time.time()
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        lay = layout.getLayout(layoutName)
+        if lay == None:
+            raise Exception('The layout ' + layoutName + ' cannot be found')
+        gameState = pacman.GameState()
+        gameState.initialize(lay, 0)
+        problem = getattr(searchAgents, problemName)(gameState)
+        if 'visualize' in dir(problem):
+            problem.visualize = False
+        func = getattr(search, function)
+        if timeout:
+            signal.signal(signal.SIGALRM, raiseTimeout)
+            signal.alarm(timeout)
+        starttime = time.time()
+        if heuristic:
+            if heuristic in dir(searchAgents):
+                heur = getattr(searchAgents, heuristic)
+            else:
+                heur = getattr(search, heuristic)
+            path = func(problem, heuristic=heur)
+        else:
+            path = func(problem)
+        signal.alarm(0)
+        row['time'] = round(time.time() - starttime, 4)
+        if path is None:
+            row['status'] = 'no path'
+        else:
+            row['cost'] = problem.getCostOfActions(path)
+        if '_expanded' in dir(problem):
+            row['expanded'] = problem._expanded
+        if 'searchStats' in dir(problem):
+            row['maxFrontier'] = problem.searchStats.maxFrontier
+    except BenchmarkTimeout:
+        row['status'] = 'timeout'
+        row['time'] = round(time.time() - starttime, 4)
+    except Exception as e:
+        signal.alarm(0)
+        row['status'] = 'error: %s' % e
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    # ru_maxrss is in kilobytes on Linux
+    row['maxRSS'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return row
+
+
+def writeTable(rows, output, format):
+    if format == 'json':
+        json.dump(rows, output, indent=2)
+        output.write('\n')
+    else:
+        writer = csv.DictWriter(output, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def readCommand(argv):
+    "Processes the command used to run the benchmark from the command line."
+    usageStr = """
+    USAGE:      python searchBenchmark.py <options>
+    EXAMPLES:   (1) python searchBenchmark.py -l 'layouts/*Maze.lay' -f bfs,ucs,astar -H nullHeuristic,manhattanHeuristic
+                    - compares three searches on every maze
+                (2) python searchBenchmark.py -l mediumCorners -p CornersProblem -f astar -H cornersHeuristic --format json
+                    - writes a JSON table for the corners heuristic
+    """
+    parser = OptionParser(usageStr)
+    parser.add_option('-l', '--layouts', dest='layouts',
+                      help=pacman.default('comma separated LAYOUTS, layout files or glob patterns'),
+                      metavar='LAYOUTS', default='layouts/*.lay')
+    parser.add_option('-p', '--problems', dest='problems',
+                      help=pacman.default('comma separated search PROBLEMS of searchAgents.py'),
+                      metavar='PROBLEMS', default='PositionSearchProblem')
+    parser.add_option('-f', '--functions', dest='functions',
+                      help=pacman.default('comma separated search FUNCTIONS of search.py'),
+                      metavar='FUNCTIONS', default='bfs')
+    parser.add_option('-H', '--heuristics', dest='heuristics',
+                      help=pacman.default('comma separated HEURISTICS, used by the functions that take one'),
+                      metavar='HEURISTICS', default='nullHeuristic')
+    parser.add_option('-j', '--jobs', dest='jobs', type='int',
+                      help=pacman.default('number of searches run in parallel'),
+                      default=multiprocessing.cpu_count())
+    parser.add_option('-t', '--timeout', dest='timeout', type='int',
+                      help=pacman.default('SECONDS allowed for each search, 0 for no limit'),
+                      metavar='SECONDS', default=60)
+    parser.add_option('-o', '--output', dest='output',
+                      help='FILE the table is written to [Default: standard output]',
+                      metavar='FILE', default=None)
+    parser.add_option('--format', dest='format', type='choice', choices=['csv', 'json'],
+                      help=pacman.default('format of the table, csv or json'), default='csv')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    for function in options.functions.split(','):
+        if function not in dir(search):
+            raise AttributeError(function + ' is not a search function in search.py.')
+    for problem in options.problems.split(','):
+        if problem not in dir(searchAgents) or not problem.endswith('Problem'):
+            raise AttributeError(problem + ' is not a search problem type in searchAgents.py.')
+    for heuristic in options.heuristics.split(','):
+        if heuristic not in dir(searchAgents) and heuristic not in dir(search):
+            raise AttributeError(heuristic + ' is not a function in searchAgents.py or search.py.')
+    return options
+
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    cells = getCells(options)
+    # A fresh process for every search keeps the peak RSS of each cell apart
+    pool = multiprocessing.Pool(options.jobs, maxtasksperchild=1)
+    try:
+        rows = pool.map(runCell, cells, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    if options.output:
+        with open(options.output, 'w') as output:
+            writeTable(rows, output, options.format)
+    else:
+        writeTable(rows, sys.stdout, options.format)
@@ -29,6 +29,7 @@
 import sys
 import inspect
 import heapq, random
+from collections import deque, OrderedDict
 
 
 class FixedRandom:
@@ -139,6 +140,10 @@ class Stack:
         "Push 'item' onto the stack"
         self.list.append(item)
 
+    def pushMany(self, items):
+        "Push every item of 'items' onto the stack, in order"
+        self.list.extend(items)
+
     def pop(self):
         "Pop the most recently pushed item from the stack"
         return self.list.pop()
@@ -147,26 +152,36 @@ class Stack:
         "Returns true if the stack is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
     def __init__(self):
-        self.list = []
+        self.list = deque()
 
     def push(self,item):
         "Enqueue the 'item' into the queue"
-        self.list.insert(0,item)
+        self.list.append(item)
+
+    def pushMany(self, items):
+        "Enqueue every item of 'items' into the queue, in order"
+        self.list.extend(items)
 
     def pop(self):
         """
           Dequeue the earliest enqueued item still in the queue. This
           operation removes the item from the queue.
         """
-        return self.list.pop()
+        return self.list.popleft()
 
     def isEmpty(self):
         "Returns true if the queue is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class PriorityQueue:
     """
       Implements a priority queue data structure. Each inserted item
@@ -190,6 +205,9 @@ class PriorityQueue:
     def isEmpty(self):
         return len(self.heap) == 0
 
+    def __len__(self):
+        return len(self.heap)
+
     def update(self, item, priority):
         # If item already in priority queue with higher priority, update its priority and rebuild the heap.
         # If item already in priority queue with equal or lower priority, do nothing.
@@ -221,6 +239,194 @@ class PriorityQueueWithFunction(PriorityQueue):
         "Adds an item to the queue with priority from the priority function"
         PriorityQueue.push(self, item, self.priorityFunction(item))
 
+    def pushMany(self, items):
+        "Adds every item of 'items' to the queue, in order"
+        for item in items:
+            PriorityQueue.push(self, item, self.priorityFunction(item))
+
+
+class IndexedPriorityQueue:
+    """
+      A priority queue in which every item appears at most once.  Items must
+      be hashable.  A map from each item to its place in the queue makes
+      update (decrease-key) cost O(log n) instead of the linear scan done by
+      PriorityQueue.update.
+
+      Two implementations are available behind the same push/pop/update/
+      isEmpty interface:
+        lazy=False: an indexed binary heap, the item->slot map is kept up to
+                    date while entries move and update sifts the entry up.
+        lazy=True:  a heapq based heap with lazy deletion, update marks the
+                    old entry as removed and pushes a new one; removed entries
+                    are discarded when they reach the top of the heap.
+
+      Items with equal priority are popped in the order in which they got that
+      priority, exactly like in PriorityQueue.
+    """
+    def __init__(self, lazy=False):
+        self.heap = []
+        self.index = {}     # item -> slot in heap (lazy=False) or entry (lazy=True)
+        self.count = 0
+        self.lazy = lazy
+
+    def push(self, item, priority):
+        "Adds 'item' to the queue, if it is already there it behaves as update"
+        if item in self.index:
+            self.update(item, priority)
+            return
+        entry = [priority, self.count, item]
+        self.count += 1
+        if self.lazy:
+            self.index[item] = entry
+            heapq.heappush(self.heap, entry)
+        else:
+            self.heap.append(entry)
+            self.index[item] = len(self.heap) - 1
+            self._siftUp(len(self.heap) - 1)
+
+    def pop(self):
+        "Removes and returns the item with the lowest priority"
+        if self.lazy:
+            while True:
+                entry = heapq.heappop(self.heap)
+                if entry[2] is not None:
+                    del self.index[entry[2]]
+                    return entry[2]
+        heap = self.heap
+        entry = heap[0]
+        last = heap.pop()
+        if heap:
+            heap[0] = last
+            self.index[last[2]] = 0
+            self._siftDown(0)
+        del self.index[entry[2]]
+        return entry[2]
+
+    def isEmpty(self):
+        return len(self.index) == 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def peek(self):
+        "Returns the item with the lowest priority without removing it"
+        if self.lazy:
+            while self.heap[0][2] is None:
+                heapq.heappop(self.heap)
+        return self.heap[0][2]
+
+    def getPriority(self, item):
+        "Returns the priority of an item that is in the queue"
+        if self.lazy:
+            return self.index[item][0]
+        return self.heap[self.index[item]][0]
+
+    def update(self, item, priority):
+        # If item already in priority queue with higher priority, update its priority.
+        # If item already in priority queue with equal or lower priority, do nothing.
+        # If item not in priority queue, do the same thing as self.push.
+        if item not in self.index:
+            self.push(item, priority)
+            return
+        if self.lazy:
+            entry = self.index[item]
+            if entry[0] <= priority:
+                return
+            entry[2] = None     # Mark the old entry as removed
+            entry = [priority, self.count, item]
+            self.index[item] = entry
+            heapq.heappush(self.heap, entry)
+        else:
+            slot = self.index[item]
+            entry = self.heap[slot]
+            if entry[0] <= priority:
+                return
+            entry[0] = priority
+            entry[1] = self.count
+            self._siftUp(slot)
+        self.count += 1
+
+    def _siftUp(self, slot):
+        heap, index = self.heap, self.index
+        entry = heap[slot]
+        while slot > 0:
+            parentSlot = (slot - 1) >> 1
+            parent = heap[parentSlot]
+            if entry < parent:
+                heap[slot] = parent
+                index[parent[2]] = slot
+                slot = parentSlot
+            else:
+                break
+        heap[slot] = entry
+        index[entry[2]] = slot
+
+    def _siftDown(self, slot):
+        heap, index = self.heap, self.index
+        size = len(heap)
+        entry = heap[slot]
+        while True:
+            childSlot = 2 * slot + 1
+            if childSlot >= size:
+                break
+            if childSlot + 1 < size and heap[childSlot + 1] < heap[childSlot]:
+                childSlot += 1
+            child = heap[childSlot]
+            if child < entry:
+                heap[slot] = child
+                index[child[2]] = slot
+                slot = childSlot
+            else:
+                break
+        heap[slot] = entry
+        index[entry[2]] = slot
+
+
+class LRUCache:
+    """
+      A dictionary-like cache holding at most maxSize entries.  When it is
+      full, the least recently used entry is evicted.  It counts the hits and
+      misses of get so the effectiveness of the cache can be measured.
+    """
+    def __init__(self, maxSize):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        "Returns the value cached for key, or default if it is not cached"
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        "Caches value for key, evicting the least recently used entry if full"
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+    def hitRate(self):
+        "Returns the fraction of calls to get that found a cached value"
+        total = self.hits + self.misses
+        if total == 0: return 0.0
+        return self.hits / float(total)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
 
 def manhattanDistance( xy1, xy2 ):
     "Returns the Manhattan distance between points xy1 and xy2"